@@ -0,0 +1,224 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import asyncio
+import hashlib
+import time
+
+from src.auth.schemas import UserPrincipal
+from src.auth.utils import decode_token
+from src.config import settings
+from src.db.redis import RedisClient, redis_client
+
+PRINCIPAL_CHANNEL = "auth:principal-invalidated"
+
+
+class ExpiringLRUCache:
+    """Bounded in-process LRU where every entry carries its own expiry (epoch seconds)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        if expires_at <= time.time():
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TokenClaimsCache:
+    """Verified JWT claims keyed by a digest of the raw token, expiring at the token's `exp`."""
+
+    def __init__(self, max_size: int):
+        self._cache = ExpiringLRUCache(max_size=max_size)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # > never keep the raw bearer token around as a dict key
+        return hashlib.sha256(token.encode()).digest()
+
+    def decode(self, token: str) -> dict:
+        """Return verified claims, running signature verification only on a cache miss.
+
+        Raises the same exceptions as `decode_token` for invalid or expired tokens.
+        """
+        key = self._key(token)
+        claims = self._cache.get(key)
+        if claims is not None:
+            return claims
+
+        claims = decode_token(token)
+        self._cache.set(key, claims, expires_at=claims.get("exp", 0))
+        return claims
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class PrincipalCache:
+    """Short-lived principals keyed by email; invalidated explicitly when the user changes.
+
+    Only consulted while `synced`, i.e. while this worker is subscribed to the
+    invalidations other workers broadcast; otherwise every lookup goes to the database.
+
+    Fills are fenced by `generation`: take it before reading the user, pass it to
+    `set`, and the fill is dropped if the user was invalidated in between (the read
+    may predate the commit the invalidation announced).
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache = ExpiringLRUCache(max_size=max_size)
+        self.synced = False
+        self.generation = 0
+        # > generation of each recent invalidation; once an email is trimmed, any
+        # > fill whose read started before its invalidation is still dropped
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten = 0
+
+    def get(self, email: str) -> Optional[UserPrincipal]:
+        if not self.synced:
+            return None
+        return self._cache.get(email)
+
+    def set(self, principal: UserPrincipal, generation: int) -> None:
+        """Cache a principal read from the database after `generation` was taken"""
+        invalidated = self._invalidated.get(principal.email, self._forgotten)
+        if generation < invalidated:
+            return
+        self._cache.set(principal.email, principal, expires_at=time.time() + self.ttl)
+
+    def invalidate(self, email: str) -> None:
+        self.generation += 1
+        self._invalidated[email] = self.generation
+        self._invalidated.move_to_end(email)
+        while len(self._invalidated) > self.max_size:
+            _, self._forgotten = self._invalidated.popitem(last=False)
+        self._cache.invalidate(email)
+
+    def clear(self) -> None:
+        # > fences every fill already in flight, whatever email it is for
+        self.generation += 1
+        self._forgotten = self.generation
+        self._invalidated.clear()
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"synced": self.synced, **self._cache.stats()}
+
+
+class PrincipalCacheSync:
+    """Broadcasts principal invalidations to every worker over Redis pub/sub"""
+
+    def __init__(self, cache: PrincipalCache, redis_client: RedisClient):
+        self.cache = cache
+        self.redis_client = redis_client
+        self._task: Optional[asyncio.Task] = None
+
+    async def invalidate(self, email: str) -> None:
+        """Call after committing a change to a user's role, verification or password"""
+        self.cache.invalidate(email)
+        # > if this fails, other workers keep the old principal for at most the TTL
+        await self.redis_client.ensure_connected()
+        if not self.redis_client.healthy:
+            return
+        try:
+            await self.redis_client.client.publish(PRINCIPAL_CHANNEL, email)
+        except Exception as e:
+            self.redis_client.mark_unhealthy()
+            print(f"Principal invalidation not broadcast: {type(e).__name__}: {str(e)}")
+
+    def start(self) -> None:
+        """Start the background task that applies other workers' invalidations"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.cache.synced = False
+
+    async def _sync_loop(self) -> None:
+        backoff = 1
+        while True:
+            pubsub = None
+            try:
+                await self.redis_client.ensure_connected()
+                pubsub = self.redis_client.client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(PRINCIPAL_CHANNEL)
+                # > anything cached before the subscription may have missed a message
+                self.cache.clear()
+                self.cache.synced = True
+                backoff = 1
+
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        email = message["data"]
+                        self.cache.invalidate(
+                            email.decode() if isinstance(email, bytes) else email
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # > bypass the cache until we are subscribed again
+                self.cache.synced = False
+                print(f"Principal cache sync failed: {type(e).__name__}: {str(e)}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+
+# Singleton instances (one per worker process)
+token_claims_cache = TokenClaimsCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+)
+principal_sync = PrincipalCacheSync(principal_cache, redis_client)
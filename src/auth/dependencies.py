@@ -1,12 +1,12 @@
 from fastapi.security import HTTPBearer
 from fastapi import Request, HTTPException, status, Depends
-from typing import Union, Annotated, List
+from typing import Union, Annotated, List, Optional
 from fastapi.security.http import HTTPAuthorizationCredentials
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.auth.utils import decode_token
+from src.auth.cache import token_claims_cache
 from src.db.redis import RedisClient, get_redis
 from src.db.main import get_session
-from src.db.models import User
+from src.auth.schemas import UserPrincipal
 from src.auth.service import UserService
 from src.errors import (
     InvalidToken,
@@ -19,6 +19,28 @@ from src.errors import (
 user_service = UserService()
 
 
+class AuthContext:
+    """Auth state for one request: resolved once, stored on `request.state`.
+
+    Every bearer, checker and route that depends on auth reads from the same
+    context, so a request costs one decode, one blocklist check and at most one
+    principal lookup no matter how many auth dependencies it declares.
+    """
+
+    __slots__ = ("token_data", "principal")
+
+    def __init__(self, token_data: dict):
+        self.token_data = token_data
+        self.principal: Optional[UserPrincipal] = None
+
+    @property
+    def roles(self) -> List[str]:
+        if self.principal is not None:
+            return [self.principal.role]
+        role = self.token_data["user"].get("role")
+        return [role] if role else []
+
+
 class TokenBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
@@ -26,29 +48,37 @@ class TokenBearer(HTTPBearer):
     async def __call__(
         self, request: Request, redis_client: Annotated[RedisClient, Depends(get_redis)]
     ) -> Union[HTTPAuthorizationCredentials, None]:
-        cred = await super().__call__(request)
-        # print(cred.scheme) #> Bearer
-        # print(cred.credentials) #> actual token
-        token = cred.credentials
+        auth_context = getattr(request.state, "auth_context", None)
+        if auth_context is None:
+            cred = await super().__call__(request)
+            # print(cred.scheme) #> Bearer
+            # print(cred.credentials) #> actual token
+            token = cred.credentials
 
-        if not self.token_valid(token):
-            raise InvalidToken()
+            token_data = self.decode_valid_token(token)
+            if token_data is None:
+                raise InvalidToken()
 
-        token_data = decode_token(token)
+            if await redis_client.token_in_BlockList(token_data["jti"]):
+                raise InvalidToken()
 
-        if await redis_client.token_in_BlockList(token_data["jti"]):
-            raise InvalidToken()
+            auth_context = AuthContext(token_data)
+            request.state.auth_context = auth_context
 
-        self.verify_token_data(token_data)
-        return token_data
+        # > access vs refresh is checked per bearer, the token itself only once
+        self.verify_token_data(auth_context.token_data)
+        return auth_context.token_data
 
-    def token_valid(self, token: str) -> bool:
+    def decode_valid_token(self, token: str) -> Optional[dict]:
+        """Verify the token once (cached per worker until `exp`) and return its claims."""
         try:
-            decode_token(token)
-            return True
+            return token_claims_cache.decode(token)
         except Exception as e:
             print(f"Token validation failed: {type(e).__name__}: {str(e)}")
-            return False
+            return None
+
+    def token_valid(self, token: str) -> bool:
+        return self.decode_valid_token(token) is not None
 
     def verify_token_data(self, token_data: dict) -> None:
         raise NotImplementedError("please override this method in subclass!!")
@@ -66,37 +96,55 @@ class RefreshTokenBearer(TokenBearer):
             raise RefreshTokenRequired()
 
 
+# > one shared instance so FastAPI's per-request dependency cache also applies
+access_token_bearer = AccessTokenBearer()
+
+
 async def get_current_user(
+    request: Request,
     session: Annotated[AsyncSession, Depends(get_session)],
-    token_data: Annotated[dict, Depends(AccessTokenBearer())],
-):
-    user_email = token_data["user"]["email"]
-    user = await user_service.get_user_by_email(user_email, session)
+    token_data: Annotated[dict, Depends(access_token_bearer)],
+) -> UserPrincipal:
+    auth_context: AuthContext = request.state.auth_context
+    if auth_context.principal is not None:
+        return auth_context.principal
 
+    user_email = token_data["user"].get("email")
     if not user_email:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token or missing email",
         )
 
+    # > principal only (uid, email, role, is_verified): no books/reviews selectin loads
+    user = await user_service.get_principal(user_email, session)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
+    auth_context.principal = user
     return user
 
 
+async def get_auth_context(
+    request: Request,
+    _: Annotated[UserPrincipal, Depends(get_current_user)],
+) -> AuthContext:
+    """Fully resolved auth context (claims + principal) for the current request"""
+    return request.state.auth_context
+
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
 
     async def __call__(
         self,
-        current_user: Annotated[User, Depends(get_current_user)],
+        auth_context: Annotated[AuthContext, Depends(get_auth_context)],
     ):
-        if not current_user.is_verified:
+        if not auth_context.principal.is_verified:
             raise AccountNotVerified()
-        
-        if current_user.role not in self.allowed_roles:
+
+        if not any(role in self.allowed_roles for role in auth_context.roles):
             raise InsufficientPermission()
         return True
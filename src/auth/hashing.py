@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import multiprocessing
+
+from src.auth.utils import generate_password_hash, verify_password
+from src.config import settings
+
+
+class PasswordHashingService:
+    """Runs argon2 hashing in a process pool so it never blocks the event loop.
+
+    At most `max_concurrency` hashes are submitted at once; extra callers wait on a
+    semaphore, which is what `waiting` (queue depth) measures.
+    """
+
+    def __init__(self, max_workers: int, max_concurrency: int):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # > metrics
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.peak_waiting = 0
+
+    def start(self) -> None:
+        """Create the worker pool (called from lifespan, or lazily on first use)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        self.start()
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(generate_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "completed": self.completed,
+        }
+
+
+# Singleton instance
+password_hasher = PasswordHashingService(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_CONCURRENCY,
+)
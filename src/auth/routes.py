@@ -9,6 +9,7 @@ from src.auth.schemas import (
     UserModel,
     UserLoginModel,
     UserBooksModel,
+    UserPrincipal,
     EmailModel,
     PasswordResetRequestModel,
     PasswordResetConfirmModel,
@@ -18,16 +19,15 @@ from src.db.main import get_session
 from src.auth.utils import (
     create_access_token,
     decode_token,
-    verify_password,
     create_url_safe_token,
     decode_url_safe_token,
-    generate_password_hash,
 )
+from src.auth.hashing import password_hasher
 from datetime import timedelta, timezone
 from src.config import settings
 from src.auth.dependencies import (
     RefreshTokenBearer,
-    AccessTokenBearer,
+    access_token_bearer,
     get_current_user,
     RoleChecker,
 )
@@ -35,11 +35,8 @@ from src.db.redis import RedisClient, get_redis
 from datetime import datetime
 from src.errors import UserAlreadyExists, UserNotFound, InvalidCredentials, InvalidToken
 
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
 from src.mail import mail, create_message, email_service
 
-limiter = Limiter(key_func=get_remote_address)
 auth_router = APIRouter()
 user_service = UserService()
 role_checker = RoleChecker(allowed_roles=["admin", "user"])
@@ -204,10 +201,9 @@ async def verify_email(
         )
 
 
+# > rate limited per IP by the Redis limiter (see src/rate_limit.py ROUTE_LIMITS)
 @auth_router.post("/login")
-@limiter.limit("5/minute")
 async def login_user(
-    request: Request,
     login_data: UserLoginModel,
     session: Annotated[AsyncSession, Depends(get_session)],
 ):
@@ -216,7 +212,7 @@ async def login_user(
     password = login_data.password
     user = await user_service.get_user_by_email(email, session)
     if user is not None:
-        password_valid = verify_password(password, user.password_hash)
+        password_valid = await password_hasher.verify(password, user.password_hash)
         if password_valid:
             access_token = create_access_token(
                 user_data={
@@ -287,15 +283,20 @@ async def get_new_access_token(
 
 @auth_router.get("/me", response_model=UserBooksModel)
 async def get_logged_in_user(
-    current_user: Annotated[dict, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)],
     _: bool = Depends(role_checker),
 ) -> UserBooksModel:
-    return current_user  # TODO try to add uid in a good looking way
+    # > the profile needs the full user with books and reviews, not just the principal
+    user = await user_service.get_user_profile(current_user.email, session)
+    if not user:
+        raise UserNotFound()
+    return user  # TODO try to add uid in a good looking way
 
 
 @auth_router.post("/logout")
 async def revoke_token(
-    token_details: Annotated[dict, Depends(AccessTokenBearer())],
+    token_details: Annotated[dict, Depends(access_token_bearer)],
     redis_client: Annotated[RedisClient, Depends(get_redis)],
 ):
     jti = token_details.get("jti")
@@ -443,7 +444,7 @@ async def reset_password(
         if not user:
             raise UserNotFound()
 
-        user.password_hash = generate_password_hash(password_data.new_password)
+        user.password_hash = await password_hasher.hash(password_data.new_password)
         user.updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
         await user_service.update_user(user, session)
 
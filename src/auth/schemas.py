@@ -47,6 +47,14 @@ class UserBooksModel(UserModel):
     reviews: List["ReviewModel"] = []
 
 
+# --- 2b. Authenticated Principal (what auth checks need, nothing more) ---
+class UserPrincipal(BaseModel):
+    uid: UUID
+    email: str
+    role: str
+    is_verified: bool
+
+
 # --- 3. User Login Model ---
 class UserLoginModel(BaseModel):
     email: EmailStr = Field(..., max_length=40, description="User's email address")
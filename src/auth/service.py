@@ -1,8 +1,10 @@
 from src.db.models import User
-from src.auth.schemas import UserCreateModel
+from src.auth.schemas import UserCreateModel, UserPrincipal
+from src.auth.cache import principal_cache, principal_sync
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from src.auth.utils import generate_password_hash, verify_password
+from sqlalchemy.orm import selectinload
+from src.auth.hashing import password_hasher
 
 
 class UserService:
@@ -12,6 +14,40 @@ class UserService:
         user = results.first()
         return user
 
+    async def get_user_profile(self, email: str, session: AsyncSession) -> User | None:
+        """User with the books and reviews shown on their profile"""
+        statement = (
+            select(User)
+            .where(User.email == email)
+            .options(selectinload(User.books), selectinload(User.reviews))
+        )
+        results = await session.exec(statement)
+        return results.first()
+
+    async def get_principal(
+        self, email: str, session: AsyncSession
+    ) -> UserPrincipal | None:
+        """Lightweight user lookup for auth checks, served from the principal cache."""
+        principal = principal_cache.get(email)
+        if principal is not None:
+            return principal
+
+        # > taken before the read so a concurrent invalidation can fence the fill
+        generation = principal_cache.generation
+        statement = select(User.uid, User.email, User.role, User.is_verified).where(
+            User.email == email
+        )
+        results = await session.exec(statement)
+        row = results.first()
+        if row is None:
+            return None
+
+        principal = UserPrincipal(
+            uid=row.uid, email=row.email, role=row.role, is_verified=row.is_verified
+        )
+        principal_cache.set(principal, generation)
+        return principal
+
     async def user_exists(self, email: str, session: AsyncSession) -> bool:
         user = await self.get_user_by_email(email, session)
         return True if user is not None else False
@@ -21,7 +57,7 @@ class UserService:
     ) -> User:
         user_data_dict = user_data.model_dump(exclude_unset=True)
         # Add password_hash before creating the User object
-        user_data_dict["password_hash"] = generate_password_hash(user_data.password)
+        user_data_dict["password_hash"] = await password_hasher.hash(user_data.password)
         user_data_dict["role"] = "user"
 
         new_user = User.model_validate(user_data_dict)
@@ -35,5 +71,8 @@ class UserService:
             setattr(user, key, value)
         session.add(user)
         await session.commit()
+        # > role / verification / password changes must be visible on the next request,
+        # > whichever worker serves it
+        await principal_sync.invalidate(user.email)
         await session.refresh(user)
         return user
@@ -8,4 +8,14 @@ from .schemas import (
     BookResponse,
     BookUpdateResponseModel,
     BookDeleteResponseModel,
+    BookDeletionScheduledModel,
+    BookPageModel,
+    UserBookPageModel,
+    BulkImportError,
+    BulkImportReport,
+    BookBatchGetModel,
+    BookBatchModel,
+    BookSuggestionModel,
+    FacetCountModel,
+    BookFacetsModel,
 )
@@ -0,0 +1,125 @@
+# > streaming formats for POST /books/bulk and GET /books/export.
+# > the upload is consumed chunk by chunk and parsed line by line, so memory stays flat
+# > no matter how large the file is. Bad lines are yielded as exceptions instead of
+# > aborting the import, so they can be listed in the report.
+from typing import AsyncIterator, Iterable, Literal, Sequence, Tuple, Union
+from src.books.schemas import BookResponse
+import csv
+import io
+import json
+
+BulkFormat = Literal["ndjson", "csv"]
+
+
+class BulkParseError(ValueError):
+    """A line that could not be turned into a record"""
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Union[str, BulkParseError]]]:
+    """(line number, text) for every line of a byte stream"""
+    buffer = b""
+    line_no = 0
+    skipping = False  # > inside a line that was already reported as too long
+
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for raw in lines:
+            line_no += 1
+            if skipping:
+                skipping = False
+                continue
+            # > a whole oversized line can arrive inside a single chunk
+            if len(raw) > max_line_bytes:
+                yield line_no, BulkParseError(
+                    f"line is longer than {max_line_bytes} bytes"
+                )
+                continue
+            yield line_no, _decode(raw, line_no)
+
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield line_no + 1, BulkParseError(
+                    f"line is longer than {max_line_bytes} bytes"
+                )
+                skipping = True
+            buffer = b""
+
+    if buffer and not skipping:
+        yield line_no + 1, _decode(buffer, line_no + 1)
+
+
+def _decode(raw: bytes, line_no: int) -> Union[str, BulkParseError]:
+    try:
+        text = raw.rstrip(b"\r").decode("utf-8")
+    except UnicodeDecodeError:
+        return BulkParseError("line is not valid UTF-8")
+    return text.lstrip("\ufeff") if line_no == 1 else text
+
+
+async def iter_records(
+    lines: AsyncIterator[Tuple[int, Union[str, BulkParseError]]], fmt: BulkFormat
+) -> AsyncIterator[Tuple[int, Union[dict, BulkParseError]]]:
+    """(line number, field dict) per non-blank line.
+
+    CSV needs a header row and one record per line (quoted newlines are not
+    supported); NDJSON needs one JSON object per line.
+    """
+    header = None
+    async for line_no, line in lines:
+        if isinstance(line, BulkParseError):
+            yield line_no, line
+            continue
+        if not line.strip():
+            continue
+
+        if fmt == "csv":
+            try:
+                values = next(csv.reader([line]))
+            except csv.Error as e:
+                yield line_no, BulkParseError(str(e))
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_no, BulkParseError(
+                    f"expected {len(header)} fields, got {len(values)}"
+                )
+                continue
+            yield line_no, dict(zip(header, values))
+        else:
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, BulkParseError(f"invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield line_no, BulkParseError("expected a JSON object")
+                continue
+            yield line_no, record
+
+
+def encode_ndjson(rows: Iterable) -> bytes:
+    """One BookResponse JSON object per line"""
+    return b"".join(
+        BookResponse.model_validate(row).model_dump_json().encode() + b"\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows: Iterable, columns: Sequence[str], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow(
+            [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in (getattr(row, column) for column in columns)
+            ]
+        )
+    return buffer.getvalue().encode()
@@ -0,0 +1,173 @@
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+from uuid import UUID
+import asyncio
+import math
+import random
+
+from src.config import settings
+from src.db.redis import RedisClient, redis_client
+
+# > cached responses live under versioned keys; a write bumps the version instead of
+# > deleting, so a reader racing the write can only fill a key nobody asks for again.
+BOOK_DETAIL_PREFIX = "cache:book:detail:"
+BOOK_VERSION_PREFIX = "cache:book:version:"
+# > bumped when a change touches many books at once (e.g. a tag rename)
+BOOK_GENERATION_KEY = "cache:book:generation"
+
+
+def book_version_key(book_uid: UUID) -> str:
+    return f"{BOOK_VERSION_PREFIX}{book_uid}"
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: Optional[str] = None  # > HTTP-date
+
+
+class BookResponseCache:
+    """Serialized `GET /books/{book_uid}` bodies (plus their validators) in Redis.
+
+    Hits skip the database and Pydantic entirely. Misses for the same key are
+    coalesced per worker (single flight), and every Redis failure degrades to a
+    plain database read.
+    """
+
+    def __init__(self, redis_client: RedisClient, ttl: int, jitter: float):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.jitter = jitter
+        # > version keys expire, but only after every body cached under them has:
+        # > a counter restarting from 0 can then never serve an old body again
+        self.version_ttl = 2 * math.ceil(ttl * (1 + jitter))
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # > metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _expiry(self) -> int:
+        # > spread expiries so keys filled together do not all miss together
+        return self.ttl + int(self.ttl * self.jitter * random.random())
+
+    def _failed(self, action: str, e: Exception) -> None:
+        self.errors += 1
+        self.redis_client.mark_unhealthy()
+        print(f"Book cache {action} failed: {type(e).__name__}: {str(e)}")
+
+    async def _cache_key(self, book_uid: UUID) -> Optional[str]:
+        """Current key for this book, or None when Redis is unavailable"""
+        await self.redis_client.ensure_connected()
+        if not self.redis_client.healthy:
+            return None
+        try:
+            version, generation = await self.redis_client.client.mget(
+                book_version_key(book_uid), BOOK_GENERATION_KEY
+            )
+        except Exception as e:
+            self._failed("lookup", e)
+            return None
+        return (
+            f"{BOOK_DETAIL_PREFIX}{book_uid}:"
+            f"{int(generation or 0)}:{int(version or 0)}"
+        )
+
+    async def _load_and_store(
+        self, key: Optional[str], loader: Callable[[], Awaitable[CachedResponse]]
+    ) -> CachedResponse:
+        cached = await loader()
+        if key is not None:
+            try:
+                async with self.redis_client.client.pipeline() as pipe:
+                    pipe.hset(
+                        key,
+                        mapping={
+                            "body": cached.body,
+                            "etag": cached.etag,
+                            "last_modified": cached.last_modified or "",
+                        },
+                    )
+                    pipe.expire(key, self._expiry())
+                    await pipe.execute()
+            except Exception as e:
+                self._failed("store", e)
+        return cached
+
+    async def get_or_load(
+        self, book_uid: UUID, loader: Callable[[], Awaitable[CachedResponse]]
+    ) -> CachedResponse:
+        """Cached response for this book; `loader` runs once per worker on a miss"""
+        key = await self._cache_key(book_uid)
+        if key is not None:
+            try:
+                fields = await self.redis_client.client.hgetall(key)
+            except Exception as e:
+                self._failed("read", e)
+                fields = None
+            if fields:
+                self.hits += 1
+                return CachedResponse(
+                    body=fields[b"body"],
+                    etag=fields[b"etag"].decode(),
+                    last_modified=fields[b"last_modified"].decode() or None,
+                )
+
+        self.misses += 1
+        flight_key = key or f"{BOOK_DETAIL_PREFIX}{book_uid}"
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_and_store(key, loader))
+            self._inflight[flight_key] = task
+            task.add_done_callback(
+                lambda done: (
+                    self._inflight.pop(flight_key, None)
+                    if self._inflight.get(flight_key) is done
+                    else None
+                )
+            )
+        else:
+            self.coalesced += 1
+        # > a cancelled request must not cancel the load other callers wait on
+        return await asyncio.shield(task)
+
+    async def _bump(self, key: str) -> None:
+        await self.redis_client.ensure_connected()
+        if not self.redis_client.healthy:
+            return
+        try:
+            async with self.redis_client.client.pipeline() as pipe:
+                pipe.incr(key)
+                pipe.expire(key, self.version_ttl)
+                await pipe.execute()
+        except Exception as e:
+            # > the stale entry still expires with its TTL
+            self._failed("invalidate", e)
+
+    async def invalidate(self, book_uid: UUID) -> None:
+        """Call after committing any change that shows up in this book's detail"""
+        await self._bump(book_version_key(book_uid))
+
+    async def invalidate_all(self) -> None:
+        """Call after committing a change that may show up in any book's detail"""
+        await self._bump(BOOK_GENERATION_KEY)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+book_cache = BookResponseCache(
+    redis_client,
+    ttl=settings.BOOK_CACHE_TTL,
+    jitter=settings.BOOK_CACHE_TTL_JITTER,
+)
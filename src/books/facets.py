@@ -0,0 +1,126 @@
+# > catalog facet counts (GET /books/facets) served from the book_facets rollup.
+# > every write that changes a facet value applies a +/- delta to the rollup inside
+# > its own transaction, so reads cost O(facet values) instead of a GROUP BY over the
+# > whole catalog. reconcile_facets() recomputes everything from scratch and is run
+# > periodically by Celery beat to repair any drift.
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import BookFacet
+
+FacetName = Literal["language", "author", "publisher", "tag"]
+
+# > Book columns that are facets; tags are counted through book_tags
+BOOK_FACET_FIELDS = ("language", "author", "publisher")
+TAG_FACET = "tag"
+
+# > rows per INSERT ... ON CONFLICT, well below Postgres' 32767 bind parameters
+UPSERT_BATCH_SIZE = 1000
+
+FACET_COUNTS_SQL = """
+    SELECT 'language', language, count(*) FROM books GROUP BY language
+    UNION ALL
+    SELECT 'author', author, count(*) FROM books GROUP BY author
+    UNION ALL
+    SELECT 'publisher', publisher, count(*) FROM books GROUP BY publisher
+    UNION ALL
+    SELECT 'tag', tags.name, count(*)
+    FROM book_tags JOIN tags ON tags.uid = book_tags.tag_id
+    GROUP BY tags.name
+"""
+
+
+def book_facet_deltas(book: Any, sign: int = 1) -> Counter:
+    """(facet, value) -> +1 for adding one book's column facets, -1 for removing"""
+    deltas = Counter()
+    for field in BOOK_FACET_FIELDS:
+        value = getattr(book, field)
+        if value is not None:
+            deltas[(field, value)] += sign
+    return deltas
+
+
+def tag_facet_deltas(tag_names: Iterable[str], sign: int = 1) -> Counter:
+    deltas = Counter()
+    for name in tag_names:
+        deltas[(TAG_FACET, name)] += sign
+    return deltas
+
+
+def facet_upsert_statements(deltas: Counter) -> List[Any]:
+    """INSERT ... ON CONFLICT DO UPDATE SET count = count + excluded.count batches.
+
+    Keys are sorted so concurrent writers lock rollup rows in the same order and
+    cannot deadlock each other.
+    """
+    rows = [
+        {"facet": facet, "value": value, "count": count}
+        for (facet, value), count in sorted(deltas.items())
+        if count
+    ]
+    facets = BookFacet.__table__
+    statements = []
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(facets).values(rows[start : start + UPSERT_BATCH_SIZE])
+        statements.append(
+            statement.on_conflict_do_update(
+                index_elements=[facets.c.facet, facets.c.value],
+                set_={"count": facets.c.count + statement.excluded["count"]},
+            )
+        )
+    return statements
+
+
+async def apply_facet_deltas(session: AsyncSession, deltas: Counter) -> None:
+    """Add the deltas to the rollup; the caller commits with its own write"""
+    for statement in facet_upsert_statements(deltas):
+        await session.exec(statement)
+
+
+async def get_facets(
+    session: AsyncSession, facet: Optional[FacetName] = None, limit: int = 20
+) -> Dict[str, List[Tuple[str, int]]]:
+    """Top `limit` values per facet by book count, read from the rollup only"""
+    rank = (
+        func.row_number()
+        .over(
+            partition_by=BookFacet.facet,
+            order_by=(BookFacet.count.desc(), BookFacet.value),
+        )
+        .label("rank")
+    )
+    ranked = select(BookFacet.facet, BookFacet.value, BookFacet.count, rank).where(
+        BookFacet.count > 0
+    )
+    if facet is not None:
+        ranked = ranked.where(BookFacet.facet == facet)
+    ranked = ranked.subquery()
+    statement = (
+        select(ranked.c.facet, ranked.c.value, ranked.c["count"])
+        .where(ranked.c.rank <= limit)
+        .order_by(ranked.c.facet, ranked.c.rank)
+    )
+    results = await session.exec(statement)
+
+    facets: Dict[str, List[Tuple[str, int]]] = {}
+    for name, value, count in results.all():
+        facets.setdefault(name, []).append((value, count))
+    return facets
+
+
+async def reconcile_facets(session: AsyncSession) -> int:
+    """Rebuild the rollup from the source tables; returns the number of rows written.
+
+    The EXCLUSIVE lock keeps readers going but makes incremental writers wait, so a
+    delta is either already in the recount or applied on top of it, never both.
+    """
+    await session.exec(text("LOCK TABLE book_facets IN EXCLUSIVE MODE"))
+    await session.exec(text("DELETE FROM book_facets"))
+    results = await session.exec(
+        text(f"INSERT INTO book_facets (facet, value, count) {FACET_COUNTS_SQL}")
+    )
+    await session.commit()
+    return results.rowcount
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.exceptions import HTTPException
-from typing import List, Annotated, Optional
+from typing import List, Annotated, Optional, Union
+from datetime import datetime, timezone
 from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
 from src.errors import BookNotFound
@@ -11,57 +13,211 @@ from src.books.schemas import (
     BookUpdateModel,
     BookUpdateResponseModel,
     BookDeleteResponseModel,
+    BookDeletionScheduledModel,
     BookCreateModel,
     BookResponse,
     BookDetailModel,
     BookSearchModel,
+    BookPageModel,
+    UserBookPageModel,
+    BulkImportReport,
+    BookFacetsModel,
+    BookSuggestionModel,
+    BookBatchGetModel,
+    BookBatchModel,
 )
-from src.db.main import get_session
+from src.books.bulk import (
+    BulkFormat,
+    encode_csv,
+    encode_ndjson,
+    iter_lines,
+    iter_records,
+)
+from src.db.projections import BookRow
+from src.config import settings
+from src.db.main import get_session, SessionLocal
 from src.books.service import BookService
-from src.auth.dependencies import AccessTokenBearer, RoleChecker
+from src.books.cache import book_cache, CachedResponse
+from src.books.facets import FacetName, get_facets
+from src.books.suggest import book_suggester
+from src.conditional import (
+    BOOKS,
+    collection_validators,
+    http_date,
+    if_match_versions,
+    is_not_modified,
+    not_modified,
+    validator_headers,
+    versioned_tag,
+)
+from src.auth.dependencies import access_token_bearer, RoleChecker
 
 book_router = APIRouter()
 book_service = BookService()
-access_token_bearer = AccessTokenBearer()
 role_checker = RoleChecker(allowed_roles=["admin", "user"])
 
 
+async def _book_detail(book_uid: UUID) -> CachedResponse:
+    """Serialized BookDetailModel with its validators, through the response cache"""
+
+    async def render() -> CachedResponse:
+        # > Last-Modified is when this read began, not a max over row timestamps:
+        # > everything in the body was committed before it, and any later change
+        # > (tag links and renames included) bumps the cache key and re-renders
+        read_at = datetime.now(timezone.utc)
+        # > own session: concurrent misses share this load, so no caller may own it
+        async with SessionLocal() as session:
+            book = await book_service.get_book(book_uid, session)
+            detail = BookDetailModel.model_validate(book, from_attributes=True)
+        body = detail.model_dump_json().encode()
+        # > the tag carries books.version: If-Match on PATCH/DELETE is tested
+        # > against it, so reviews and tags changing the body never fail a write
+        etag = versioned_tag(detail.version, body)
+        return CachedResponse(body, etag, http_date(read_at))
+
+    return await book_cache.get_or_load(book_uid, render)
+
+
 #! --- GET ALL BOOKS ---
-@book_router.get("/", response_model=List[BookResponse])
+@book_router.get("/", response_model=Union[BookPageModel, List[BookResponse]])
 async def get_all_books(
+    request: Request,
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    user_token: Annotated[dict, Depends(access_token_bearer)],
+    _: Annotated[bool, Depends(role_checker)],
+    cursor: Annotated[Optional[str], "next_cursor from the previous page"] = None,
+    skip: Annotated[Optional[int], "Legacy offset paging, returns a plain list"] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
+) -> Union[BookPageModel, List[BookResponse]]:
+    validators = await collection_validators(request, BOOKS)
+    if validators is not None:
+        if is_not_modified(request, *validators):
+            return not_modified(*validators)
+        response.headers.update(validator_headers(*validators))
+
+    # > offset paging is kept for old clients; it gets slower the deeper you page
+    if skip is not None:
+        return await book_service.get_all_books(session, skip, limit)
+
+    books, next_cursor = await book_service.get_books_page(session, limit, cursor)
+    return {"items": books, "next_cursor": next_cursor}
+
+
+#! --- EXPORT BOOKS ---
+@book_router.get("/export", response_class=StreamingResponse)
+async def export_books(
+    user_token: Annotated[dict, Depends(access_token_bearer)],
+    _: Annotated[bool, Depends(role_checker)],
+    fmt: Annotated[BulkFormat, Query(alias="format")] = "ndjson",
+) -> StreamingResponse:
+    """Stream the whole catalog as NDJSON or CSV"""
+
+    async def body():
+        # > own session: the stream outlives the request-scoped one
+        async with SessionLocal() as session:
+            first = True
+            async for batch in book_service.iter_book_batches(
+                session, settings.EXPORT_BATCH_SIZE
+            ):
+                if fmt == "csv":
+                    yield encode_csv(batch, BookRow.__slots__, header=first)
+                else:
+                    yield encode_ndjson(batch)
+                first = False
+            if first and fmt == "csv":
+                yield encode_csv([], BookRow.__slots__, header=True)
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="books.{fmt}"'},
+    )
+
+
+#! --- CATALOG FACETS ---
+@book_router.get("/facets", response_model=BookFacetsModel)
+async def get_book_facets(
     session: Annotated[AsyncSession, Depends(get_session)],
     user_token: Annotated[dict, Depends(access_token_bearer)],
     _: Annotated[bool, Depends(role_checker)],
-    skip: Annotated[int, "Number of records to skip"] = 0,
-    limit: Annotated[int, "Maximum number of records to return"] = 100,
-) -> List[
-    BookResponse
-]:  # > Changed Optional[List[Book]] to List[Book] since it returns an empty list [] if none found, not None
-    books = await book_service.get_all_books(session, skip, limit)
-    return books
+    facet: Optional[FacetName] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> BookFacetsModel:
+    """Book counts per language, author, publisher and tag, from the facet rollup"""
+    facets = await get_facets(session, facet, limit)
+    return {
+        "facets": {
+            name: [{"value": value, "count": count} for value, count in values]
+            for name, values in facets.items()
+        }
+    }
+
+
+#! --- TYPE-AHEAD SUGGESTIONS ---
+@book_router.get("/suggest", response_model=List[BookSuggestionModel])
+async def suggest_books(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    user_token: Annotated[dict, Depends(access_token_bearer)],
+    _: Annotated[bool, Depends(role_checker)],
+    q: Annotated[str, Query(min_length=1, max_length=100)],
+    limit: Annotated[int, Query(ge=1, le=20)] = 10,
+) -> List[BookSuggestionModel]:
+    """Titles and authors starting with `q`, from this worker's in-memory index"""
+    suggestions = book_suggester.suggest(q, limit)
+    if suggestions is None:
+        # > the index is still being built (or Redis is down); ask Postgres
+        suggestions = await book_service.suggest_books(session, q, limit)
+    return suggestions
 
 
 #! --- GET SINGLE BOOK ---
 @book_router.get("/{book_uid}", response_model=BookDetailModel)
 async def get_book(
+    request: Request,
     book_uid: Annotated[UUID, "Book UID from path"],
-    session: Annotated[AsyncSession, Depends(get_session)],
     user_token: Annotated[dict, Depends(access_token_bearer)],
     _: Annotated[bool, Depends(role_checker)],
-) -> BookDetailModel:
-    book = await book_service.get_book(book_uid, session)
-    return book
+) -> Response:
+    # > served straight from the cached JSON bytes; writes bump the cache version
+    detail = await _book_detail(book_uid)
+    if is_not_modified(request, detail.etag, detail.last_modified):
+        return not_modified(detail.etag, detail.last_modified)
+    return Response(
+        content=detail.body,
+        media_type="application/json",
+        headers=validator_headers(detail.etag, detail.last_modified),
+    )
 
 
 #! --- GET ALL User BOOKS ---
-@book_router.get("/user/{user_uid}", response_model=List[Book])
+@book_router.get("/user/{user_uid}", response_model=UserBookPageModel)
 async def get_user_book_submissions(
+    request: Request,
+    response: Response,
     user_uid: Annotated[UUID, "User UID from path"],
     session: Annotated[AsyncSession, Depends(get_session)],
     _: Annotated[bool, Depends(role_checker)],
-) -> List[Book]:
-    books = await book_service.get_user_books(user_uid, session)
-    return books
+    cursor: Annotated[Optional[str], "next_cursor from the previous page"] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
+    include_total: bool = False,
+) -> UserBookPageModel:
+    validators = await collection_validators(request, BOOKS)
+    if validators is not None:
+        if is_not_modified(request, *validators):
+            return not_modified(*validators)
+        response.headers.update(validator_headers(*validators))
+
+    books, next_cursor = await book_service.get_user_books_page(
+        user_uid, session, limit, cursor
+    )
+    page = {"items": books, "next_cursor": next_cursor}
+    if include_total:
+        page["total"], page["total_is_exact"] = await book_service.count_user_books(
+            user_uid, session, settings.USER_BOOKS_COUNT_CAP
+        )
+    return page
 
 
 #! --- CREATE BOOK ---
@@ -77,21 +233,67 @@ async def create_a_book(
     return new_book
 
 
+#! --- BULK IMPORT BOOKS ---
+@book_router.post("/bulk", response_model=BulkImportReport)
+async def bulk_import_books(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    user_token: Annotated[dict, Depends(access_token_bearer)],
+    _: Annotated[bool, Depends(role_checker)],
+    fmt: Annotated[
+        Optional[BulkFormat],
+        Query(alias="format", description="Defaults from the Content-Type header"),
+    ] = None,
+) -> BulkImportReport:
+    """Stream NDJSON (one book per line) or CSV (header row first) into the catalog"""
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = "csv" if "csv" in content_type else "ndjson"
+
+    user_uid = UUID(user_token.get("user")["uid"])
+    lines = iter_lines(request.stream(), settings.BULK_IMPORT_MAX_LINE_BYTES)
+    return await book_service.bulk_create_books(
+        session, user_uid, iter_records(lines, fmt)
+    )
+
+
+#! --- BATCH GET BOOKS ---
+@book_router.post("/batch-get", response_model=BookBatchModel)
+async def batch_get_books(
+    batch: BookBatchGetModel,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    user_token: Annotated[dict, Depends(access_token_bearer)],
+    _: Annotated[bool, Depends(role_checker)],
+) -> BookBatchModel:
+    """Up to 100 books with reviews and tags, in request order, in one round trip"""
+    books = await book_service.get_books(batch.uids, session)
+    return BookBatchModel.model_validate(
+        {
+            "books": books,
+            "missing": [uid for uid, book in zip(batch.uids, books) if book is None],
+        },
+        from_attributes=True,
+    )
+
+
 #! --- UPDATE BOOK (CRITICAL FIX APPLIED) ---
 @book_router.patch("/{book_uid}", response_model=BookUpdateResponseModel)
 async def update_book(
+    request: Request,
     book_uid: Annotated[UUID, "Book UID from path"],
     book_update_data: BookUpdateModel,
     session: Annotated[AsyncSession, Depends(get_session)],
     user_token: Annotated[dict, Depends(access_token_bearer)],
     _: Annotated[bool, Depends(role_checker)],
 ) -> BookUpdateResponseModel:
-
-    current_book = await book_service.get_book(book_uid, session)
     user_uid = user_token.get("user")["uid"]
-    old_book_data = current_book.model_copy()
-    new_updated_book_data = await book_service.update_book(
-        book_uid, UUID(user_uid), book_update_data, session
+    # > snapshot, ownership/version/If-Match check and update are one statement
+    old_book_data, new_updated_book_data = await book_service.update_book(
+        book_uid,
+        UUID(user_uid),
+        book_update_data,
+        session,
+        if_match=if_match_versions(request),
     )
     response_data = {
         "message": "Book Updated Successfully!",
@@ -106,14 +308,48 @@ async def update_book(
     "/{book_uid}",
     status_code=status.HTTP_200_OK,
     response_model=BookDeleteResponseModel,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": BookDeletionScheduledModel,
+            "description": "Book has too many reviews; deleted in the background",
+        }
+    },
 )
 async def delete_book(
+    request: Request,
     book_uid: Annotated[UUID, "Book UID from path"],
     session: Annotated[AsyncSession, Depends(get_session)],
     user_token: Annotated[dict, Depends(access_token_bearer)],
     _: Annotated[bool, Depends(role_checker)],
 ) -> BookDeleteResponseModel:
-    book_to_delete = await book_service.delete_book(book_uid, session)
+    if_match = if_match_versions(request)
+    if await book_service.has_many_reviews(
+        book_uid, session, settings.BOOK_DELETE_ASYNC_THRESHOLD
+    ):
+        # Import inside the function to avoid circular imports
+        from src.celery_tasks import delete_book_task
+
+        if if_match is not None:
+            await book_service.claim_version(book_uid, if_match, session)
+            # > the precondition held when claimed; an inline fallback must not
+            # > test it again against the version it just bumped
+            if_match = None
+
+        try:
+            delete_book_task.delay(str(book_uid))
+        except Exception as e:
+            # > no broker: fall back to deleting inline
+            print(f"Could not schedule book deletion: {type(e).__name__}: {str(e)}")
+        else:
+            scheduled = BookDeletionScheduledModel(
+                message="Book deletion scheduled", book_uid=book_uid
+            )
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=scheduled.model_dump(mode="json"),
+            )
+
+    book_to_delete = await book_service.delete_book(book_uid, session, if_match)
     return {
         "message": "Book Deleted Successfully!",
         "deleted_book": book_to_delete,
@@ -121,19 +357,25 @@ async def delete_book(
 
 
 #! --- SEARCH BOOKS ---
-@book_router.post("/search/", response_model=List[BookResponse])
+@book_router.post("/search/", response_model=Union[BookPageModel, List[BookResponse]])
 async def search_books(
     book_data: BookSearchModel,
     session: Annotated[AsyncSession, Depends(get_session)],
     user_token: Annotated[dict, Depends(access_token_bearer)],
     _: Annotated[bool, Depends(role_checker)],
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    skip: Optional[int] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
 ):
-    books = await book_service.search_books(
-        session,
-        book_data,
-        skip=skip,
-        limit=limit,
+    if skip is not None:
+        return await book_service.search_books(
+            session,
+            book_data,
+            skip=skip,
+            limit=limit,
+        )
+
+    books, next_cursor = await book_service.search_books_page(
+        session, book_data, limit=limit, cursor=cursor
     )
-    return books
+    return {"items": books, "next_cursor": next_cursor}
@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List, TYPE_CHECKING
+from typing import Dict, Literal, Optional, List, TYPE_CHECKING
 from uuid import UUID
 from datetime import datetime, date
 from pydantic import ConfigDict
+
 if TYPE_CHECKING:
     from src.reviews.schemas import ReviewModel
     from src.tags.schemas import TagModel
@@ -24,6 +25,7 @@ class Book(BookBase):
     user_uid: UUID
     created_at: datetime
     updated_at: datetime
+    version: int = 1
 
 
 # --- 3. Request Models ---
@@ -48,9 +50,14 @@ class BookUpdateModel(BaseModel):
     published_date: Optional[date] = None
     page_count: Optional[int] = None
     language: Optional[str] = None
+    # > version the client last read; a stale one is rejected with 409
+    version: Optional[int] = None
 
 
 class BookSearchModel(BaseModel):
+    # > free text over title, author and publisher, ranked by relevance
+    query: Optional[str] = Field(default=None, max_length=200)
+    # > per-field substring filters
     title: Optional[str] = None
     author: Optional[str] = None
     publisher: Optional[str] = None
@@ -74,9 +81,34 @@ class BookResponse(BaseModel):
     language: str
     created_at: datetime
     updated_at: datetime
+    version: int = 1
     model_config = ConfigDict(from_attributes=True)  # works with SQLModel objects
 
 
+class BookPageModel(BaseModel):
+    items: List[BookResponse]
+    next_cursor: Optional[str] = None  # > pass back as ?cursor= for the next page
+
+
+class UserBookPageModel(BookPageModel):
+    # > only with ?include_total=true; counting stops at USER_BOOKS_COUNT_CAP
+    total: Optional[int] = None
+    total_is_exact: Optional[bool] = None
+
+
+class BulkImportError(BaseModel):
+    line: int  # > 1-based line in the uploaded file
+    errors: List[dict]
+
+
+class BulkImportReport(BaseModel):
+    received: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[BulkImportError] = []
+    errors_truncated: bool = False  # > more errors than BULK_IMPORT_MAX_ERRORS
+
+
 class BookUpdateResponseModel(BaseModel):
     message: str
     old_book: BookResponse
@@ -88,6 +120,37 @@ class BookDeleteResponseModel(BaseModel):
     deleted_book: BookResponse
 
 
+class BookDeletionScheduledModel(BaseModel):
+    message: str
+    book_uid: UUID
+
+
+class BookBatchGetModel(BaseModel):
+    uids: List[UUID] = Field(min_length=1, max_length=100)
+
+
+class BookBatchModel(BaseModel):
+    # > one entry per requested uid, in request order; null where there is no book
+    books: List[Optional[BookDetailModel]]
+    missing: List[UUID] = []
+
+
+class BookSuggestionModel(BaseModel):
+    kind: Literal["title", "author"]
+    text: str
+    book_uid: Optional[UUID] = None  # > set for titles
+
+
+class FacetCountModel(BaseModel):
+    value: str
+    count: int
+
+
+class BookFacetsModel(BaseModel):
+    # > facet name (language, author, publisher, tag) -> most common values first
+    facets: Dict[str, List[FacetCountModel]]
+
+
 # Rebuild models with forward references after all classes are defined
 def rebuild_models():
     """Rebuild models to resolve forward references."""
@@ -96,6 +159,7 @@ def rebuild_models():
         from src.tags.schemas import TagModel
 
         BookDetailModel.model_rebuild()
+        BookBatchModel.model_rebuild()
     except Exception:
         pass  # Ignore if dependencies aren't loaded yet
 
@@ -2,34 +2,137 @@
 #! any async function you have to call it using await thats not optional
 #! every thing starts with async must be used with await
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.books.schemas import BookCreateModel, BookUpdateModel, BookSearchModel
-from sqlmodel import select, desc, func
+from src.books.schemas import (
+    BookCreateModel,
+    BookUpdateModel,
+    BookSearchModel,
+    BulkImportError,
+    BulkImportReport,
+)
+from src.books.bulk import BulkParseError
+from sqlmodel import select, desc, func, or_
+from sqlalchemy import any_, bindparam, delete, literal_column, true, update
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import selectinload
-from src.db.models import Book
-from typing import Optional, List  # Recommended for better type hinting
-from datetime import datetime
-from uuid import UUID
-from src.errors import BookNotFound, InsufficientPermission
+from src.db.models import Book, BookTag, Review, Tag
+from src.db.projections import BookRow
+from src.books.cache import book_cache
+from src.conditional import BOOKS, REVIEWS, collection_versions
+from src.books.suggest import book_suggester
+from src.books.facets import apply_facet_deltas, book_facet_deltas, tag_facet_deltas
+from typing import Optional, List, Tuple, AsyncIterator, Union
+from collections import Counter
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+from pydantic import ValidationError
+from src.config import settings
+from src.errors import (
+    BookNotFound,
+    BookVersionConflict,
+    InsufficientPermission,
+    PreconditionFailed,
+)
+from src.db.pagination import (
+    keyset_paginate,
+    split_page,
+    encode_offset_cursor,
+    decode_offset_cursor,
+)
+
+# > generated column, maintained by Postgres (see BOOK_SEARCH_VECTOR_SQL in models)
+BOOK_SEARCH_VECTOR = literal_column("books.search_vector", type_=TSVECTOR)
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+# > column order of the records handed to COPY in bulk_create_books
+BULK_COLUMNS = (
+    "uid",
+    "title",
+    "author",
+    "publisher",
+    "published_date",
+    "page_count",
+    "language",
+    "user_uid",
+    "created_at",
+    "updated_at",
+)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _contains_pattern(term: str) -> str:
+    """ILIKE pattern matching `term` literally anywhere (pg_trgm index-backed)"""
+    return f"%{_escape_like(term)}%"
 
 
 class BookService:
     async def get_all_books(
         self, session: AsyncSession, skip: int = 0, limit: int = 100
-    ) -> List[Book]:
+    ) -> List[BookRow]:
         statement = (
-            select(Book).order_by(desc(Book.created_at)).offset(skip).limit(limit)
+            BookRow.select().order_by(desc(Book.created_at)).offset(skip).limit(limit)
         )
         results = await session.exec(statement)
-        return results.all()
+        return BookRow.from_rows(results.all())
 
-    async def get_user_books(self, user_uid: UUID, session: AsyncSession) -> List[Book]:
-        statement = (
-            select(Book)
-            .where(Book.user_uid == user_uid)
-            .order_by(desc(Book.created_at))
+    async def get_books_page(
+        self, session: AsyncSession, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[BookRow], Optional[str]]:
+        """Keyset page of books, newest first; seeks via idx_book_created"""
+        statement = keyset_paginate(
+            BookRow.select(), Book.created_at, Book.uid, cursor, limit
         )
         results = await session.exec(statement)
-        return results.all()
+        return split_page(BookRow.from_rows(results.all()), limit)
+
+    async def get_user_books_page(
+        self,
+        user_uid: UUID,
+        session: AsyncSession,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[BookRow], Optional[str]]:
+        """Keyset page of a user's books; a range scan on idx_book_user_created"""
+        statement = keyset_paginate(
+            BookRow.select().where(Book.user_uid == user_uid),
+            Book.created_at,
+            Book.uid,
+            cursor,
+            limit,
+        )
+        results = await session.exec(statement)
+        return split_page(BookRow.from_rows(results.all()), limit)
+
+    async def count_user_books(
+        self, user_uid: UUID, session: AsyncSession, cap: int
+    ) -> Tuple[int, bool]:
+        """(count, exact): counting stops after `cap` rows of the index"""
+        capped = (
+            select(Book.uid).where(Book.user_uid == user_uid).limit(cap + 1).subquery()
+        )
+        results = await session.exec(select(func.count()).select_from(capped))
+        count = results.one()
+        return min(count, cap), count <= cap
+
+    async def iter_book_batches(
+        self, session: AsyncSession, batch_size: int
+    ) -> AsyncIterator[List[BookRow]]:
+        """Whole catalog, oldest first, through a server-side cursor.
+
+        Rows are plain column projections (no ORM state to expunge), and only one
+        batch of `batch_size` rows is in memory at a time.
+        """
+        statement = (
+            BookRow.select()
+            .order_by(Book.created_at, Book.uid)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream(statement)
+        async for rows in result.partitions():
+            yield BookRow.from_rows(rows)
 
     async def get_book(self, book_uid: UUID, session: AsyncSession) -> Optional[Book]:
         statement = (
@@ -43,6 +146,28 @@ class BookService:
             raise BookNotFound()
         return book  # Returns Book or None
 
+    def _batch_statement(self, book_uids: List[UUID]):
+        # > one array parameter whatever the batch size, so the plan is reused
+        uids = bindparam("uids", book_uids, type_=ARRAY(PG_UUID(as_uuid=True)))
+        return (
+            select(Book)
+            .where(Book.uid == any_(uids))
+            .options(selectinload(Book.reviews), selectinload(Book.tags))
+        )
+
+    async def get_books(
+        self, book_uids: List[UUID], session: AsyncSession
+    ) -> List[Optional[Book]]:
+        """Books for `book_uids` in the same order, None for unknown uids.
+
+        One query for the books plus one selectin query per relationship for all
+        of them, however many uids are asked for.
+        """
+        unique_uids = list(dict.fromkeys(book_uids))
+        results = await session.exec(self._batch_statement(unique_uids))
+        books = {book.uid: book for book in results.all()}
+        return [books.get(book_uid) for book_uid in book_uids]
+
     async def create_book(
         self, book_data: BookCreateModel, user_uid: str, session: AsyncSession
     ) -> Book:
@@ -52,60 +177,440 @@ class BookService:
         session.add(
             new_book
         )  # > you dont have to use await with this because it's done in python memory
+        await apply_facet_deltas(session, book_facet_deltas(new_book))
         await session.commit()
+        await collection_versions.bump(BOOKS)
         await session.refresh(new_book)
+        await book_suggester.books_changed(
+            [(new_book.uid, new_book.title, new_book.author)]
+        )
         return new_book
 
+    def _update_statement(
+        self,
+        book_uid: UUID,
+        user_uid: UUID,
+        changes: dict,
+        version: Optional[int],
+        if_match: Optional[List[int]] = None,
+    ):
+        """One statement: lock the row, update it if allowed, return old and new.
+
+        WITH old AS (SELECT ... FOR UPDATE),
+             upd AS (UPDATE books ... FROM old WHERE owner/version match RETURNING ...)
+        SELECT old.*, upd.* FROM old LEFT JOIN upd ON true
+
+        `version` comes from the body and `if_match` from the If-Match header; both
+        are tested against the locked row.
+        """
+        books = Book.__table__
+        old = (
+            select(*(books.c[name] for name in BookRow.__slots__))
+            .where(books.c.uid == book_uid)
+            .with_for_update()
+            .cte("old")
+        )
+        conditions = [books.c.uid == old.c.uid, old.c.user_uid == user_uid]
+        if version is not None:
+            conditions.append(old.c.version == version)
+        if if_match is not None:
+            conditions.append(old.c.version.in_(if_match))
+        upd = (
+            update(books)
+            .where(*conditions)
+            .values(
+                **changes,
+                version=books.c.version + 1,
+                updated_at=datetime.now(timezone.utc).replace(tzinfo=None),
+            )
+            .returning(*(books.c[name] for name in BookRow.__slots__))
+            .cte("upd")
+        )
+        return select(
+            *(old.c[name] for name in BookRow.__slots__),
+            *(upd.c[name] for name in BookRow.__slots__),
+        ).select_from(old.outerjoin(upd, true()))
+
     async def update_book(
         self,
         book_uid: UUID,
         user_uid: UUID,
         update_data: BookUpdateModel,
         session: AsyncSession,
-    ) -> Book:
-        book_to_update = await self.get_book(book_uid, session=session)
-        if book_to_update is not None:
-            #! Use exclude_unset=True to only update provided fields
-            book_update_dict = update_data.model_dump(exclude_unset=True)
-            if book_to_update.user_uid != user_uid:
+        if_match: Optional[List[int]] = None,
+    ) -> Tuple[BookRow, BookRow]:
+        """Apply a PATCH in a single round trip; returns (old, updated)"""
+        #! Use exclude_unset=True to only update provided fields
+        changes = update_data.model_dump(exclude_unset=True, exclude_none=True)
+        version = changes.pop("version", None)
+
+        result = await session.exec(
+            self._update_statement(book_uid, user_uid, changes, version, if_match)
+        )
+        row = result.first()
+        if row is None:
+            raise BookNotFound()
+
+        width = len(BookRow.__slots__)
+        old_book = BookRow.from_row(row[:width])
+        if row[width] is None:
+            await session.rollback()
+            if old_book.user_uid != user_uid:
                 raise InsufficientPermission()
-            for k, v in book_update_dict.items():
-                setattr(book_to_update, k, v)
-            await session.commit()
-            await session.refresh(book_to_update)
-            return book_to_update
-        return None
-
-    # > ... delete_book (CRITICAL fix: await, and removed unnecessary refresh)
-    async def delete_book(self, book_uid: UUID, session: AsyncSession) -> Book:
-        book_to_delete = await self.get_book(book_uid, session=session)
-        await session.delete(book_to_delete)
+            if if_match is not None and old_book.version not in if_match:
+                raise PreconditionFailed()
+            raise BookVersionConflict()
+
+        new_book = BookRow.from_row(row[width:])
+        deltas = book_facet_deltas(new_book)
+        deltas.subtract(book_facet_deltas(old_book))
+        await apply_facet_deltas(session, deltas)
         await session.commit()
-        # // Removed unnecessary await session.refresh()
-        return book_to_delete
+        await book_cache.invalidate(book_uid)
+        await collection_versions.bump(BOOKS)
+        if (old_book.title, old_book.author) != (new_book.title, new_book.author):
+            await book_suggester.books_changed(
+                [(new_book.uid, new_book.title, new_book.author)]
+            )
+        return old_book, new_book
 
-    async def search_books(
+    async def has_many_reviews(
+        self, book_uid: UUID, session: AsyncSession, threshold: int
+    ) -> bool:
+        """True if the book has more than `threshold` reviews (stops counting there)"""
+        statement = (
+            select(Review.uid)
+            .where(Review.book_uid == book_uid)
+            .offset(threshold)
+            .limit(1)
+        )
+        results = await session.exec(statement)
+        return results.first() is not None
+
+    async def _missing_or_changed(self, book_uid: UUID, session: AsyncSession):
+        """The error for a conditional write that matched no row"""
+        results = await session.exec(select(Book.uid).where(Book.uid == book_uid))
+        if results.first() is None:
+            return BookNotFound()
+        return PreconditionFailed()
+
+    async def claim_version(
+        self, book_uid: UUID, if_match: List[int], session: AsyncSession
+    ) -> None:
+        """Test If-Match for a write that completes later (the background delete).
+
+        The version is bumped in the same statement, so a concurrent write sent
+        against the matched version fails from here on.
+        """
+        books = Book.__table__
+        results = await session.exec(
+            update(books)
+            .where(books.c.uid == book_uid, books.c.version.in_(if_match))
+            .values(version=books.c.version + 1)
+            .returning(books.c.uid)
+        )
+        if results.first() is None:
+            raise await self._missing_or_changed(book_uid, session)
+        await session.commit()
+        await book_cache.invalidate(book_uid)
+        await collection_versions.bump(BOOKS)
+
+    async def _delete_book_row(
         self,
+        book_uid: UUID,
         session: AsyncSession,
-        search_params: BookSearchModel,
-        skip: int = 0,
-        limit: int = 100,
-    ) -> List[Book]:
-        statement = select(Book)
+        if_match: Optional[List[int]] = None,
+    ) -> BookRow:
+        # > reviews and tag links are removed by ON DELETE CASCADE, never loaded;
+        # > only the tag names are read first, for the facet rollup
+        tag_names = await session.exec(
+            select(Tag.name)
+            .join(BookTag, BookTag.tag_id == Tag.uid)
+            .where(BookTag.book_id == book_uid)
+        )
+        tag_names = tag_names.all()
+        books = Book.__table__
+        statement = (
+            delete(books)
+            .where(books.c.uid == book_uid)
+            .returning(*(books.c[name] for name in BookRow.__slots__))
+        )
+        if if_match is not None:
+            statement = statement.where(books.c.version.in_(if_match))
+        results = await session.exec(statement)
+        row = results.first()
+        if row is None:
+            if if_match is not None:
+                raise await self._missing_or_changed(book_uid, session)
+            raise BookNotFound()
+        book = BookRow.from_row(row)
+        deltas = book_facet_deltas(book, sign=-1)
+        deltas.update(tag_facet_deltas(tag_names, sign=-1))
+        await apply_facet_deltas(session, deltas)
+        return book
+
+    async def delete_book(
+        self,
+        book_uid: UUID,
+        session: AsyncSession,
+        if_match: Optional[List[int]] = None,
+    ) -> BookRow:
+        """Single DELETE ... RETURNING; Postgres cascades to the children"""
+        book_to_delete = await self._delete_book_row(book_uid, session, if_match)
+        await session.commit()
+        await book_cache.invalidate(book_uid)
+        # > the delete cascades to the book's reviews
+        await collection_versions.bump(BOOKS, REVIEWS)
+        await book_suggester.book_removed(book_uid)
+        return book_to_delete
+
+    async def delete_book_in_batches(
+        self, book_uid: UUID, session: AsyncSession, batch_size: int
+    ) -> Tuple[Optional[BookRow], int]:
+        """Background delete for books with huge review sets.
+
+        Reviews go in short transactions of `batch_size` rows so no single statement
+        holds locks or bloats WAL for long; the book row goes last. The caller is
+        responsible for invalidating the book cache and the list versions.
+        """
+        deleted_reviews = 0
+        while True:
+            batch = (
+                select(Review.uid).where(Review.book_uid == book_uid).limit(batch_size)
+            )
+            results = await session.exec(delete(Review).where(Review.uid.in_(batch)))
+            await session.commit()
+            deleted_reviews += results.rowcount
+            if results.rowcount < batch_size:
+                break
+
+        try:
+            book = await self._delete_book_row(book_uid, session)
+        except BookNotFound:
+            return None, deleted_reviews
+        await session.commit()
+        return book, deleted_reviews
+
+    def _search_statement(self, search_params: BookSearchModel):
+        statement = BookRow.select()
 
+        # > leading-wildcard ILIKE on the bare column is served by the gin_trgm_ops
+        # > indexes; wrapping the column in lower() would defeat them
         if search_params.title:
             statement = statement.where(
-                func.lower(Book.title).ilike(f"%{search_params.title}%")
+                Book.title.ilike(_contains_pattern(search_params.title), escape="\\")
             )
         if search_params.author:
             statement = statement.where(
-                func.lower(Book.title).ilike(f"%{search_params.author}%")
+                Book.author.ilike(_contains_pattern(search_params.author), escape="\\")
             )
         if search_params.publisher:
             statement = statement.where(
-                func.lower(Book.title).ilike(f"%{search_params.publisher}%")
+                Book.publisher.ilike(
+                    _contains_pattern(search_params.publisher), escape="\\"
+                )
+            )
+        return statement
+
+    def _ranked_search_statement(self, search_params: BookSearchModel):
+        """Full-text match (idx_book_search) OR fuzzy title (idx_book_title_trgm)"""
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, search_params.query)
+        rank = func.ts_rank_cd(BOOK_SEARCH_VECTOR, ts_query)
+        similarity = func.similarity(Book.title, search_params.query)
+        return (
+            self._search_statement(search_params)
+            .where(
+                or_(
+                    BOOK_SEARCH_VECTOR.op("@@")(ts_query),
+                    Book.title.op("%")(search_params.query),
+                )
+            )
+            .order_by(
+                desc(rank), desc(similarity), desc(Book.created_at), desc(Book.uid)
+            )
+        )
+
+    async def suggest_books(
+        self, session: AsyncSession, query: str, limit: int = 10
+    ) -> List[dict]:
+        """Prefix matches from Postgres, in SuggestIndex.suggest()'s shape.
+
+        Only used while this worker's suggest index is still being built.
+        """
+        pattern = f"{_escape_like(query.strip())}%"
+        titles = await session.exec(
+            select(Book.uid, Book.title)
+            .where(Book.title.ilike(pattern, escape="\\"))
+            .order_by(Book.title)
+            .limit(limit)
+        )
+        suggestions = [
+            {"kind": "title", "text": title, "book_uid": str(uid)}
+            for uid, title in titles.all()
+        ]
+        if len(suggestions) < limit:
+            authors = await session.exec(
+                select(Book.author)
+                .distinct()
+                .where(Book.author.ilike(pattern, escape="\\"))
+                .order_by(Book.author)
+                .limit(limit - len(suggestions))
+            )
+            suggestions.extend(
+                {"kind": "author", "text": author, "book_uid": None}
+                for author in authors.all()
+            )
+        return suggestions
+
+    async def search_books(
+        self,
+        session: AsyncSession,
+        search_params: BookSearchModel,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[BookRow]:
+        if search_params.query:
+            statement = self._ranked_search_statement(search_params)
+        else:
+            statement = self._search_statement(search_params).order_by(
+                desc(Book.created_at)
             )
+        statement = statement.offset(skip).limit(limit)
+        results = await session.exec(statement)
+        return BookRow.from_rows(results.all())
 
-        statement = statement.order_by(desc(Book.created_at)).offset(skip).limit(limit)
+    async def search_books_page(
+        self,
+        session: AsyncSession,
+        search_params: BookSearchModel,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[BookRow], Optional[str]]:
+        if search_params.query:
+            # > relevance order: every match is scored anyway, so page by offset
+            offset = decode_offset_cursor(cursor)
+            statement = (
+                self._ranked_search_statement(search_params)
+                .offset(offset)
+                .limit(limit + 1)
+            )
+            results = BookRow.from_rows((await session.exec(statement)).all())
+            next_cursor = (
+                encode_offset_cursor(offset + limit) if len(results) > limit else None
+            )
+            return list(results[:limit]), next_cursor
+
+        statement = keyset_paginate(
+            self._search_statement(search_params),
+            Book.created_at,
+            Book.uid,
+            cursor,
+            limit,
+        )
         results = await session.exec(statement)
-        return results.all()
+        return split_page(BookRow.from_rows(results.all()), limit)
+
+    async def bulk_create_books(
+        self,
+        session: AsyncSession,
+        user_uid: UUID,
+        records: AsyncIterator[Tuple[int, Union[dict, BulkParseError]]],
+    ) -> BulkImportReport:
+        """Validate streamed records one by one and COPY them in in fixed-size chunks.
+
+        Each chunk is committed on its own, so a failing chunk does not undo the
+        ones before it. Only one chunk is held in memory at a time.
+        """
+        report = BulkImportReport()
+        chunk: List[tuple] = []
+        chunk_lines: List[int] = []
+        chunk_facets = Counter()
+
+        async for line_no, record in records:
+            report.received += 1
+            if isinstance(record, BulkParseError):
+                parse_error = {"type": "parse_error", "msg": str(record)}
+                self._reject(report, line_no, [parse_error])
+                continue
+            try:
+                book = BookCreateModel.model_validate(record)
+            except ValidationError as e:
+                errors = e.errors(
+                    include_url=False, include_context=False, include_input=False
+                )
+                self._reject(report, line_no, errors)
+                continue
+
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            chunk.append(
+                (
+                    uuid4(),
+                    book.title,
+                    book.author,
+                    book.publisher,
+                    book.published_date,
+                    book.page_count,
+                    book.language,
+                    user_uid,
+                    now,
+                    now,
+                )
+            )
+            chunk_lines.append(line_no)
+            chunk_facets.update(book_facet_deltas(book))
+            if len(chunk) >= settings.BULK_IMPORT_CHUNK_SIZE:
+                await self._copy_books(
+                    session, chunk, chunk_lines, chunk_facets, report
+                )
+                chunk, chunk_lines, chunk_facets = [], [], Counter()
+
+        if chunk:
+            await self._copy_books(session, chunk, chunk_lines, chunk_facets, report)
+        return report
+
+    async def _copy_books(
+        self,
+        session: AsyncSession,
+        records: List[tuple],
+        lines: List[int],
+        facet_deltas: Counter,
+        report: BulkImportReport,
+    ) -> None:
+        try:
+            # > asyncpg's binary COPY, on the connection the session already holds
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                "books", records=records, columns=BULK_COLUMNS
+            )
+            await apply_facet_deltas(session, facet_deltas)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            self._reject(
+                report,
+                lines[0],
+                [
+                    {
+                        "type": "copy_failed",
+                        "msg": f"lines {lines[0]}-{lines[-1]} were not imported: {e}",
+                    }
+                ],
+                rows=len(records),
+            )
+            return
+        report.imported += len(records)
+        await collection_versions.bump(BOOKS)
+        await book_suggester.books_changed(
+            (record[0], record[1], record[2]) for record in records
+        )
+
+    @staticmethod
+    def _reject(
+        report: BulkImportReport, line: int, errors: List[dict], rows: int = 1
+    ) -> None:
+        report.failed += rows
+        if len(report.errors) < settings.BULK_IMPORT_MAX_ERRORS:
+            report.errors.append(BulkImportError(line=line, errors=errors))
+        else:
+            report.errors_truncated = True
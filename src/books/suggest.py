@@ -0,0 +1,335 @@
+# > title/author type-ahead for GET /books/suggest, answered from memory.
+# > every worker keeps sorted arrays of normalized keys and finds a prefix with one
+# > bisect, so a keystroke never reaches Postgres. Writes are applied locally and
+# > broadcast on a Redis channel to the other workers; a periodic rebuild from the
+# > database repairs anything a worker missed (same scheme as the blocklist mirror).
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from heapq import merge
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import asyncio
+import json
+import time
+import unicodedata
+
+from sqlmodel import select
+
+from src.config import settings
+from src.db.models import Book
+from src.db.redis import RedisClient, redis_client
+
+SUGGEST_CHANNEL = "books:suggest"
+# > word-start keys per field: "the lord of the rings" is also found by "lord", "rings"
+MAX_WORD_KEYS = 8
+# > changes up to this many keys are inserted in place; bigger batches are merged
+INSORT_MAX_KEYS = 256
+# > batches with more books than this are applied in a thread, off the event loop
+INLINE_MAX_BOOKS = 32
+
+# > (normalized key, kind, display text, book uid)
+SuggestKey = Tuple[str, str, str, str]
+# > uid -> (title, author), or None when the book was removed
+SuggestChanges = Dict[str, Optional[Tuple[str, str]]]
+
+
+def normalize(text: str) -> str:
+    """Case-folded, accent-free, single-spaced text"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+class SuggestIndex:
+    """Prefix index over book titles and authors.
+
+    `_starts` holds whole normalized values and `_words` the suffixes that start at a
+    later word, so matches at the start of a title or name are listed first.
+    """
+
+    def __init__(self):
+        self._starts: List[SuggestKey] = []
+        self._words: List[SuggestKey] = []
+        self._books: Dict[str, Tuple[str, str]] = {}  # > uid -> (title, author)
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    @staticmethod
+    def _keys(
+        uid: str, title: str, author: str
+    ) -> Tuple[List[SuggestKey], List[SuggestKey]]:
+        starts, words = [], []
+        for kind, text in (("title", title), ("author", author)):
+            normalized = normalize(text)
+            if not normalized:
+                continue
+            starts.append((normalized, kind, text, uid))
+            tokens = normalized.split(" ")
+            for i in range(1, min(len(tokens), MAX_WORD_KEYS)):
+                words.append((" ".join(tokens[i:]), kind, text, uid))
+        return starts, words
+
+    @classmethod
+    def build(cls, books: Iterable[Tuple[UUID, str, str]]) -> "SuggestIndex":
+        """A fresh index over all books (one sort instead of n inserts)"""
+        index = cls()
+        for uid, title, author in books:
+            uid = str(uid)
+            book_starts, book_words = cls._keys(uid, title, author)
+            index._starts.extend(book_starts)
+            index._words.extend(book_words)
+            index._books[uid] = (title, author)
+        index._starts.sort()
+        index._words.sort()
+        return index
+
+    def put(self, uid: UUID, title: str, author: str) -> None:
+        """Add a book, or replace what is indexed for it"""
+        self.update({str(uid): (title, author)})
+
+    def remove(self, uid: UUID) -> None:
+        self.update({str(uid): None})
+
+    def update(self, changes: SuggestChanges) -> None:
+        """Apply a batch of adds, edits and removals.
+
+        Small batches are inserted in place; bigger ones are sorted once and merged
+        into new arrays, which are swapped in when done.
+        """
+        dropped: Tuple[List[SuggestKey], List[SuggestKey]] = ([], [])
+        added: Tuple[List[SuggestKey], List[SuggestKey]] = ([], [])
+        for uid, book in changes.items():
+            old = self._books.get(uid)
+            if old == book:
+                continue
+            if old is not None:
+                for keys, old_keys in zip(dropped, self._keys(uid, *old)):
+                    keys.extend(old_keys)
+                del self._books[uid]
+            if book is not None:
+                for keys, new_keys in zip(added, self._keys(uid, *book)):
+                    keys.extend(new_keys)
+                self._books[uid] = book
+
+        size = sum(map(len, dropped)) + sum(map(len, added))
+        if size <= INSORT_MAX_KEYS:
+            for array, old_keys, new_keys in zip(
+                (self._starts, self._words), dropped, added
+            ):
+                for key in old_keys:
+                    i = bisect_left(array, key)
+                    if i < len(array) and array[i] == key:
+                        del array[i]
+                for key in new_keys:
+                    insort(array, key)
+            return
+
+        starts, words = (
+            self._merged(array, old_keys, new_keys)
+            for array, old_keys, new_keys in zip(
+                (self._starts, self._words), dropped, added
+            )
+        )
+        self._starts, self._words = starts, words
+
+    @staticmethod
+    def _merged(
+        array: List[SuggestKey], dropped: List[SuggestKey], added: List[SuggestKey]
+    ) -> List[SuggestKey]:
+        if not dropped and not added:
+            return array
+        dropped = set(dropped)
+        kept = (key for key in array if key not in dropped) if dropped else array
+        return list(merge(kept, sorted(added)))
+
+    def suggest(self, query: str, limit: int = 10) -> List[dict]:
+        """Distinct titles (with their book) and authors whose words start with query"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        for array in (self._starts, self._words):
+            i = bisect_left(array, (prefix,))
+            # > bound the scan: a popular author can own thousands of keys
+            for key in array[i : i + limit * 50]:
+                normalized, kind, text, uid = key
+                if not normalized.startswith(prefix):
+                    break
+                seen_key = (kind, text, uid if kind == "title" else None)
+                if seen_key in seen:
+                    continue
+                seen.add(seen_key)
+                results.append(
+                    {
+                        "kind": kind,
+                        "text": text,
+                        "book_uid": uid if kind == "title" else None,
+                    }
+                )
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+class BookSuggester:
+    """Per-worker SuggestIndex kept current through Redis pub/sub"""
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self.index = SuggestIndex()
+        self.synced = False
+        self.last_sync: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        # > one index writer at a time, whether it runs on the loop or in a thread
+        self._lock = asyncio.Lock()
+
+        # > metrics
+        self.lookups = 0
+        self.fallbacks = 0
+
+    ## --- write events ---
+    async def books_changed(self, books: Iterable[Tuple[UUID, str, str]]) -> None:
+        """Call after committing new or edited books, as (uid, title, author)"""
+        await self._publish(
+            [
+                {"uid": str(uid), "title": title, "author": author}
+                for uid, title, author in books
+            ]
+        )
+
+    async def book_removed(self, book_uid: UUID) -> None:
+        """Call after committing a book delete"""
+        await self._publish([{"uid": str(book_uid), "removed": True}])
+
+    async def apply(self, events: List[dict]) -> None:
+        """Apply write events in order; big batches are merged in a thread"""
+        changes: SuggestChanges = {}
+        for event in events:
+            uid = str(event["uid"])
+            # > last event per book wins, so a batch is applied as one update
+            changes.pop(uid, None)
+            changes[uid] = (
+                None if event.get("removed") else (event["title"], event["author"])
+            )
+        if not changes:
+            return
+        async with self._lock:
+            if len(changes) <= INLINE_MAX_BOOKS:
+                self.index.update(changes)
+            else:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self.index.update, changes)
+
+    async def _publish(self, events: List[dict]) -> None:
+        await self.apply(events)
+
+        await self.redis_client.ensure_connected()
+        if not self.redis_client.healthy or not events:
+            return
+        try:
+            # > one message per batch: a bulk import chunk is one publish, not 5000
+            await self.redis_client.client.publish(SUGGEST_CHANNEL, json.dumps(events))
+        except Exception as e:
+            # > other workers pick the change up at their next rebuild
+            self.redis_client.mark_unhealthy()
+            print(f"Book suggest publish failed: {type(e).__name__}: {str(e)}")
+
+    ## --- lookups ---
+    def suggest(self, query: str, limit: int) -> Optional[List[dict]]:
+        """Suggestions, or None while the index has not been built yet"""
+        if not self.synced:
+            self.fallbacks += 1
+            return None
+        self.lookups += 1
+        return self.index.suggest(query, limit)
+
+    ## --- sync ---
+    def start(self) -> None:
+        """Start the background task that builds the index and keeps it in sync"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.synced = False
+
+    async def _rebuild(self) -> None:
+        """Rebuild from one streaming query over (uid, title, author)"""
+        from src.db.main import SessionLocal
+
+        books = []
+        async with SessionLocal() as session:
+            statement = select(Book.uid, Book.title, Book.author).execution_options(
+                yield_per=settings.EXPORT_BATCH_SIZE
+            )
+            result = await session.stream(statement)
+            async for rows in result.partitions():
+                books.extend(rows)
+        # > sorting every key takes seconds on a large catalog; keep it off the loop
+        loop = asyncio.get_running_loop()
+        index = await loop.run_in_executor(None, SuggestIndex.build, books)
+        async with self._lock:
+            self.index = index
+        self.synced = True
+        self.last_sync = time.time()
+
+    async def _sync_loop(self) -> None:
+        backoff = 1
+        while True:
+            pubsub = None
+            try:
+                await self.redis_client.ensure_connected()
+                pubsub = self.redis_client.client.pubsub(ignore_subscribe_messages=True)
+                # > subscribe before the rebuild so no write falls in between
+                await pubsub.subscribe(SUGGEST_CHANNEL)
+                await self._rebuild()
+                backoff = 1
+
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        events = json.loads(message["data"])
+                        # > a batch is a list; single events (Celery deletes) a dict
+                        if isinstance(events, dict):
+                            events = [events]
+                        await self.apply(events)
+                    age = time.time() - self.last_sync
+                    if age >= settings.SUGGEST_REBUILD_INTERVAL:
+                        await self._rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # > a built index keeps answering; it is only stale until the resync
+                print(f"Book suggest sync failed: {type(e).__name__}: {str(e)}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    def stats(self) -> dict:
+        return {
+            "synced": self.synced,
+            "books": len(self.index),
+            "lookups": self.lookups,
+            "fallbacks": self.fallbacks,
+            "last_sync": (
+                datetime.fromtimestamp(self.last_sync, tz=timezone.utc).isoformat()
+                if self.last_sync
+                else None
+            ),
+        }
+
+
+# Singleton instance
+book_suggester = BookSuggester(redis_client)
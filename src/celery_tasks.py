@@ -41,4 +41,92 @@ def send_email_task(self, link: str, user_email: str, user_name: str, subject: s
         return {"status": "success", "email": user_email, "tag": tag}
     except Exception as e:
         print(f"[Celery Task] Failed to send email to {user_email}: {str(e)}")
-        raise self.retry(exc=e, countdown=60)
\ No newline at end of file
+        raise self.retry(exc=e, countdown=60)
+
+
+@c_app.task(name="delete_book_task", bind=True, max_retries=5)
+def delete_book_task(self, book_uid: str):
+    """Delete a book with a very large review set in small batches"""
+
+    # Import inside the function to avoid circular imports
+    from src.books.cache import book_cache, book_version_key
+    from src.books.service import BookService
+    from src.books.suggest import SUGGEST_CHANNEL
+    from src.conditional import BOOKS, REVIEWS, queue_collection_bumps
+    from uuid import UUID
+    import json
+    import redis
+
+    print(f"[Celery Task] Deleting book {book_uid}")
+    try:
+        book, deleted_reviews = async_to_sync(_delete_book_in_batches)(
+            BookService(), UUID(book_uid)
+        )
+    except Exception as e:
+        print(f"[Celery Task] Failed to delete book {book_uid}: {str(e)}")
+        raise self.retry(exc=e, countdown=30)
+
+    # > the API's async Redis client is bound to another event loop; use a sync one,
+    # > closed on exit so each run does not leave its connection pool behind
+    with redis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD or None,
+    ) as sync_redis:
+        with sync_redis.pipeline() as pipe:
+            pipe.incr(book_version_key(book_uid))
+            pipe.expire(book_version_key(book_uid), book_cache.version_ttl)
+            queue_collection_bumps(pipe, (BOOKS, REVIEWS))
+            pipe.execute()
+        if book:
+            sync_redis.publish(
+                SUGGEST_CHANNEL, json.dumps({"uid": book_uid, "removed": True})
+            )
+
+    print(f"[Celery Task] Book {book_uid} deleted with {deleted_reviews} reviews")
+    return {
+        "status": "success" if book else "not_found",
+        "book_uid": book_uid,
+        "reviews_deleted": deleted_reviews,
+    }
+
+
+@c_app.task(name="reconcile_facets_task", bind=True, max_retries=3)
+def reconcile_facets_task(self):
+    """Rebuild the book_facets rollup from the catalog to repair any drift"""
+
+    # Import inside the function to avoid circular imports
+    from src.books.facets import reconcile_facets
+
+    try:
+        rows = async_to_sync(_run_in_session)(reconcile_facets)
+    except Exception as e:
+        print(f"[Celery Task] Failed to reconcile book facets: {str(e)}")
+        raise self.retry(exc=e, countdown=60)
+
+    print(f"[Celery Task] Book facets reconciled ({rows} values)")
+    return {"status": "success", "facet_values": rows}
+
+
+async def _delete_book_in_batches(book_service, book_uid):
+    return await _run_in_session(
+        book_service.delete_book_in_batches,
+        book_uid,
+        batch_size=settings.BOOK_DELETE_BATCH_SIZE,
+    )
+
+
+async def _run_in_session(work, *args, **kwargs):
+    """await work(*args, session=..., **kwargs) on a session of its own"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    # > a private engine per run: pooled asyncpg connections cannot cross event loops
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            return await work(*args, session=session, **kwargs)
+    finally:
+        await engine.dispose()
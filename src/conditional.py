@@ -0,0 +1,213 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Response, status
+from fastapi.requests import Request
+from typing import Any, Iterable, List, Optional, Tuple
+import hashlib
+
+from src.db.redis import RedisClient, redis_client
+from src.errors import PreconditionFailed
+
+# > conditional requests (RFC 9110 section 13): validators are computed before any rows
+# > are loaded, so a matching If-None-Match / If-Modified-Since costs one Redis read
+# > (or one cheap query for a single row) and no serialization.
+
+
+def entity_tag(*parts: Any) -> str:
+    """Strong ETag over the given parts; bytes are hashed as-is"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\x00")
+    return f'"{digest.hexdigest()}"'
+
+
+def versioned_tag(version: int, *parts: Any) -> str:
+    """Strong ETag over `parts` that also names the row version it was built from.
+
+    Writes check If-Match against the version inside their own UPDATE/DELETE (see
+    if_match_versions), so the check and the write are one atomic step.
+    """
+    return f'"{version}.{entity_tag(*parts)[1:-1]}"'
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def timestamp_version(value: datetime) -> int:
+    """Row version from an updated_at column (naive UTC), exact to the microsecond"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    """HTTP-date for a naive-UTC (or aware) timestamp"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _parse_etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[str] = None
+) -> bool:
+    """True when the client's cached copy is still current (answer with 304)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # > If-None-Match uses weak comparison and wins over If-Modified-Since
+        tags = _parse_etags(if_none_match)
+        return "*" in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(last_modified) <= since
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[str] = None) -> dict:
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[str] = None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, last_modified),
+    )
+
+
+def if_match_versions(request: Request) -> Optional[List[int]]:
+    """Row versions named by If-Match, for the write's own WHERE clause.
+
+    None when there is no precondition (no header, or `*`: the write already fails on
+    a missing row). Raises PreconditionFailed when no tag can match, e.g. weak tags.
+    """
+    if_match = request.headers.get("if-match")
+    if if_match is None:
+        return None
+    tags = _parse_etags(if_match)
+    if "*" in tags:
+        return None
+    versions = []
+    for tag in tags:
+        version, dot, _ = tag.strip('"').partition(".")
+        if tag.startswith('"') and dot and version.isdigit():
+            versions.append(int(version))
+    if not versions:
+        raise PreconditionFailed()
+    return versions
+
+
+# > list validators come from a per-collection version counter in Redis that every
+# > write bumps after its commit, so a list request never aggregates over its table
+COLLECTION_VERSION_PREFIX = "cache:collection:"
+BOOKS, REVIEWS, TAGS = "books", "reviews", "tags"
+
+
+def collection_version_key(collection: str) -> str:
+    return f"{COLLECTION_VERSION_PREFIX}{collection}"
+
+
+def _now_micros() -> int:
+    return timestamp_version(datetime.now(timezone.utc))
+
+
+def queue_collection_bumps(pipe: Any, collections: Iterable[str]) -> None:
+    """Queue the bump commands on a sync or async Redis pipeline"""
+    now = _now_micros()
+    for collection in collections:
+        key = collection_version_key(collection)
+        # > a counter lost with Redis restarts from the clock, so it never hands
+        # > out a version (and ETag) that an earlier counter already used
+        pipe.hsetnx(key, "version", now)
+        pipe.hincrby(key, "version", 1)
+        pipe.hset(key, "modified", now)
+
+
+class CollectionVersions:
+    """Version counters for the list endpoints (books, reviews, tags).
+
+    Filtered lists (a user's books, one book's reviews) share their collection's
+    counter: coarser, but any write that could change them still moves it.
+    """
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self.errors = 0
+
+    def _failed(self, action: str, e: Exception) -> None:
+        self.errors += 1
+        self.redis_client.mark_unhealthy()
+        print(f"Collection version {action} failed: {type(e).__name__}: {str(e)}")
+
+    async def state(self, collection: str) -> Optional[Tuple[int, int]]:
+        """(version, modified in epoch microseconds), or None when Redis is down"""
+        await self.redis_client.ensure_connected()
+        if not self.redis_client.healthy:
+            return None
+        key = collection_version_key(collection)
+        try:
+            version, modified = await self.redis_client.client.hmget(
+                key, "version", "modified"
+            )
+            if version is None or modified is None:
+                now = _now_micros()
+                async with self.redis_client.client.pipeline() as pipe:
+                    pipe.hsetnx(key, "version", now)
+                    pipe.hsetnx(key, "modified", now)
+                    pipe.hmget(key, "version", "modified")
+                    *_, (version, modified) = await pipe.execute()
+        except Exception as e:
+            self._failed("lookup", e)
+            return None
+        return int(version), int(modified)
+
+    async def bump(self, *collections: str) -> None:
+        """Call after committing any change that shows up in these lists"""
+        await self.redis_client.ensure_connected()
+        if not self.redis_client.healthy:
+            return
+        try:
+            async with self.redis_client.client.pipeline() as pipe:
+                queue_collection_bumps(pipe, collections)
+                await pipe.execute()
+        except Exception as e:
+            # > lists then go without validators until Redis is healthy again
+            self._failed("bump", e)
+
+
+collection_versions = CollectionVersions(redis_client)
+
+
+async def collection_validators(
+    request: Request, collection: str
+) -> Optional[Tuple[str, Optional[str]]]:
+    """ETag and Last-Modified for one list response (query string included).
+
+    None when Redis is unavailable: the response then carries no validators, since a
+    stale 304 is worse than a full body.
+    """
+    state = await collection_versions.state(collection)
+    if state is None:
+        return None
+    version, modified = state
+    return (
+        entity_tag(request.url.path, request.url.query, collection, version),
+        http_date(_EPOCH + timedelta(microseconds=modified)),
+    )
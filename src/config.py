@@ -24,12 +24,86 @@ class Settings(BaseSettings):
         le=2592000,
         description="Refresh token expiry in seconds",
     )
+    TOKEN_CACHE_MAX_SIZE: int = Field(
+        default=10000, ge=0, description="Max verified tokens cached per worker"
+    )
+    PRINCIPAL_CACHE_TTL: int = Field(
+        default=60, ge=0, description="Seconds an authenticated principal is cached"
+    )
+    PRINCIPAL_CACHE_MAX_SIZE: int = Field(
+        default=10000, ge=0, description="Max principals cached per worker"
+    )
+    PASSWORD_HASH_WORKERS: int = Field(
+        default=2, ge=1, description="Processes used for argon2 hashing per worker"
+    )
+    PASSWORD_HASH_CONCURRENCY: int = Field(
+        default=4, ge=1, description="Max hashes submitted to the pool at once"
+    )
 
     # Redis
     REDIS_HOST: str = Field(default="localhost")
     REDIS_PORT: int = Field(default=6379, ge=1, le=65535)
     REDIS_PASSWORD: str | None = Field(default=None)
     REDIS_DB: int = Field(default=0, ge=0, le=15)
+    REDIS_MAX_CONNECTIONS: int = Field(
+        default=50, ge=1, description="Connection pool size per worker"
+    )
+    REDIS_HEALTH_CHECK_INTERVAL: int = Field(
+        default=30, ge=0, description="Seconds before idle connections are re-checked"
+    )
+    REDIS_RECONNECT_BACKOFF: int = Field(
+        default=5, ge=1, description="Min seconds between reconnect attempts"
+    )
+
+    # Token blocklist mirror
+    BLOCKLIST_BLOOM_BITS: int = Field(
+        default=1 << 20, ge=1024, description="Bloom filter size in bits"
+    )
+    BLOCKLIST_BLOOM_HASHES: int = Field(default=5, ge=1, le=16)
+    BLOCKLIST_RESYNC_INTERVAL: int = Field(
+        default=300, ge=10, description="Seconds between full mirror rebuilds"
+    )
+
+    # Response caches
+    BOOK_CACHE_TTL: int = Field(
+        default=300, ge=1, description="Seconds a cached book detail response lives"
+    )
+    BOOK_CACHE_TTL_JITTER: float = Field(
+        default=0.1, ge=0, le=1, description="Random extra TTL, as a fraction"
+    )
+
+    # Bulk import / export
+    BULK_IMPORT_CHUNK_SIZE: int = Field(
+        default=5000, ge=1, description="Rows written per COPY"
+    )
+    BULK_IMPORT_MAX_ERRORS: int = Field(
+        default=1000, ge=0, description="Row errors listed in the import report"
+    )
+    BULK_IMPORT_MAX_LINE_BYTES: int = Field(
+        default=64 * 1024, ge=1024, description="Longest accepted input line"
+    )
+    BOOK_DELETE_ASYNC_THRESHOLD: int = Field(
+        default=1000, ge=0, description="Reviews above which deletes run in Celery"
+    )
+    BOOK_DELETE_BATCH_SIZE: int = Field(
+        default=5000, ge=1, description="Reviews removed per background transaction"
+    )
+    USER_BOOKS_COUNT_CAP: int = Field(
+        default=10000, ge=1, description="Max rows counted for a user's book total"
+    )
+    EXPORT_BATCH_SIZE: int = Field(
+        default=1000, ge=1, description="Rows fetched per server-side cursor round trip"
+    )
+
+    # Book title/author suggestions
+    SUGGEST_REBUILD_INTERVAL: int = Field(
+        default=600, ge=10, description="Seconds between suggest index rebuilds"
+    )
+
+    # Catalog facets
+    FACET_RECONCILE_INTERVAL: int = Field(
+        default=3600, ge=60, description="Seconds between facet rollup rebuilds"
+    )
 
     # Security
     CORS_ORIGINS: list[str] = Field(
@@ -48,6 +122,12 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = Field(default="Book Management API")
     PROJECT_VERSION: str = Field(default="1.0.0")
 
+    # ORM loading
+    STRICT_RELATIONSHIP_LOADING: bool = Field(
+        default=False,
+        description="Raise on any access to an unloaded relationship (tests)",
+    )
+
     # Rate limiting
     RATE_LIMIT_REQUESTS: int = Field(default=100, description="Requests per minute")
     RATE_LIMIT_PERIOD: int = Field(
@@ -109,4 +189,12 @@ c_app.conf.update(
     enable_utc=True,
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
-)
\ No newline at end of file
+)
+
+# > periodic jobs, run by `celery -A src.celery_tasks beat`
+c_app.conf.beat_schedule = {
+    "reconcile-book-facets": {
+        "task": "reconcile_facets_task",
+        "schedule": settings.FACET_RECONCILE_INTERVAL,
+    },
+}
\ No newline at end of file
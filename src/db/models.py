@@ -2,6 +2,8 @@ from sqlmodel import SQLModel, Field, Relationship, Index
 from uuid import UUID, uuid4
 from datetime import datetime, date, timezone
 from typing import Optional, List
+from sqlalchemy import DDL, Column, Computed, Integer, UniqueConstraint, event
+from src.config import settings
 
 
 # > in this way we are using the explicit way of defining the models in sqlmodel
@@ -11,6 +13,11 @@ from typing import Optional, List
 # > this is done by just defining the fields as class attributes without using Column
 # > both ways are valid and can be used together in the same project
 
+# > relationships never load implicitly: each query declares the relations its
+# > response needs with selectinload(). "raise_on_sql" still lets a many-to-one be
+# > served from the identity map; strict mode (tests) raises on any unloaded access.
+RELATIONSHIP_LAZY = "raise" if settings.STRICT_RELATIONSHIP_LOADING else "raise_on_sql"
+
 
 class TimestampMixin:
     created_at: datetime = Field(
@@ -44,10 +51,10 @@ class User(SQLModel, TimestampMixin, table=True):
 
     # > Relationships
     books: List["Book"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": RELATIONSHIP_LAZY}
     )
     reviews: List["Review"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": RELATIONSHIP_LAZY}
     )
 
     def __repr__(self):
@@ -56,7 +63,9 @@ class User(SQLModel, TimestampMixin, table=True):
 
 class BookTag(SQLModel, table=True):
     __tablename__ = "book_tags"
-    book_id: UUID = Field(default=None, foreign_key="books.uid", primary_key=True)
+    book_id: UUID = Field(
+        default=None, foreign_key="books.uid", primary_key=True, ondelete="CASCADE"
+    )
     tag_id: UUID = Field(default=None, foreign_key="tags.uid", primary_key=True)
 
 
@@ -65,7 +74,6 @@ class Book(SQLModel, TimestampMixin, table=True):
     __table_args__ = (
         Index("idx_book_title", "title"),
         Index("idx_book_author", "author"),
-        Index("idx_book_user", "user_uid"),
         Index("idx_book_created", "created_at"),
     )
     # > Primary Key
@@ -79,16 +87,25 @@ class Book(SQLModel, TimestampMixin, table=True):
     page_count: int
     language: str
     user_uid: Optional[UUID] = Field(default=None, foreign_key="users_table.uid")
+    # > optimistic concurrency: bumped by every update (see BookService.update_book)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
 
     # > Relationships
-    user: Optional["User"] = Relationship(back_populates="books")
+    user: Optional["User"] = Relationship(
+        back_populates="books", sa_relationship_kwargs={"lazy": RELATIONSHIP_LAZY}
+    )
+    # > reviews and tag links go with the book via ON DELETE CASCADE (d8e4b1c7f2a9);
+    # > passive_deletes stops the ORM from loading them just to delete them
     reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="book",
+        passive_deletes=True,
+        sa_relationship_kwargs={"lazy": RELATIONSHIP_LAZY},
     )
     tags: List["Tag"] = Relationship(
         link_model=BookTag,
         back_populates="books",
-        sa_relationship_kwargs={"lazy": "selectin"},
+        passive_deletes=True,
+        sa_relationship_kwargs={"lazy": RELATIONSHIP_LAZY},
     )
 
     ## Validation methods
@@ -110,10 +127,45 @@ class Book(SQLModel, TimestampMixin, table=True):
         return f"<BOOK {self.title} by {self.author}>"
 
 
+# > a user's books, newest first, as one index range scan (see migration e2a7c9d4b3f1).
+# > declared here because DESC needs the mapped columns; it replaces idx_book_user.
+Index(
+    "idx_book_user_created",
+    Book.user_uid,
+    Book.created_at.desc(),
+    Book.uid.desc(),
+)
+
+
+# > full-text search support for books (see migration b7d2e9c4a1f3).
+# > `search_vector` is a generated column maintained by Postgres itself, so it is not
+# > mapped on the model; query it with `src.books.service.BOOK_SEARCH_VECTOR`.
+# > these DDL hooks only run when create_all() creates the table (init_db / tests).
+BOOK_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(publisher, '')), 'C')"
+)
+for _ddl in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({BOOK_SEARCH_VECTOR_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS idx_book_search ON books USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS idx_book_title_trgm ON books "
+    "USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_book_author_trgm ON books "
+    "USING gin (author gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_book_publisher_trgm ON books "
+    "USING gin (publisher gin_trgm_ops)",
+):
+    event.listen(Book.__table__, "after_create", DDL(_ddl))
+
+
 class Review(SQLModel, TimestampMixin, table=True):
     __tablename__ = "reviews"
     __table_args__ = (
-        Index("idx_review_user_book", "user_uid", "book_uid"),
+        # > one review per user and book; also the ON CONFLICT target for inserts
+        UniqueConstraint("user_uid", "book_uid", name="uq_review_user_book"),
         Index("idx_review_rating", "rating"),
         Index("idx_review_created", "created_at"),
     )
@@ -124,11 +176,17 @@ class Review(SQLModel, TimestampMixin, table=True):
     rating: int = Field(..., ge=1, le=5)
     review_text: str = Field(default=None, max_length=2000)
     user_uid: Optional[UUID] = Field(default=None, foreign_key="users_table.uid")
-    book_uid: Optional[UUID] = Field(default=None, foreign_key="books.uid")
+    book_uid: Optional[UUID] = Field(
+        default=None, foreign_key="books.uid", ondelete="CASCADE"
+    )
 
     # > Relationships
-    user: Optional["User"] = Relationship(back_populates="reviews")
-    book: Optional["Book"] = Relationship(back_populates="reviews")
+    user: Optional["User"] = Relationship(
+        back_populates="reviews", sa_relationship_kwargs={"lazy": RELATIONSHIP_LAZY}
+    )
+    book: Optional["Book"] = Relationship(
+        back_populates="reviews", sa_relationship_kwargs={"lazy": RELATIONSHIP_LAZY}
+    )
 
     ## Validation methods
     def validate_rating(self):
@@ -143,6 +201,22 @@ class Review(SQLModel, TimestampMixin, table=True):
         return f"<REVIEW {self.rating} stars by User {self.user_uid} for Book {self.book_uid}>"
 
 
+# > per-book and per-user review feeds, newest first, as index range scans
+# > (see migration a4c9e1f7b2d3)
+Index(
+    "idx_review_book_created",
+    Review.book_uid,
+    Review.created_at.desc(),
+    Review.uid.desc(),
+)
+Index(
+    "idx_review_user_created",
+    Review.user_uid,
+    Review.created_at.desc(),
+    Review.uid.desc(),
+)
+
+
 class Tag(SQLModel, TimestampMixin, table=True):
     __tablename__ = "tags"
     __table_args__ = (Index("idx_tag_name", "name", unique=True),)
@@ -153,13 +227,64 @@ class Tag(SQLModel, TimestampMixin, table=True):
     books: List["Book"] = Relationship(
         link_model=BookTag,
         back_populates="tags",
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": RELATIONSHIP_LAZY},
     )
 
     def __repr__(self) -> str:
         return f"<Tag {self.name}>"
 
 
+# > lowest / highest rating present, derived by Postgres from the histogram so a
+# > deleted review never forces a rescan
+RATING_MIN_SQL = " ".join(
+    ["CASE"] + [f"WHEN count_{r} > 0 THEN {r}" for r in range(1, 6)] + ["END"]
+)
+RATING_MAX_SQL = " ".join(
+    ["CASE"] + [f"WHEN count_{r} > 0 THEN {r}" for r in range(5, 0, -1)] + ["END"]
+)
+
+
+class BookRatingStats(SQLModel, table=True):
+    """Per-book review aggregates, kept current by src/reviews/stats.py"""
+
+    __tablename__ = "book_rating_stats"
+    book_uid: UUID = Field(
+        foreign_key="books.uid", primary_key=True, ondelete="CASCADE"
+    )
+    review_count: int = Field(default=0)
+    rating_sum: int = Field(default=0)
+    # > histogram: number of 1..5 star reviews
+    count_1: int = Field(default=0)
+    count_2: int = Field(default=0)
+    count_3: int = Field(default=0)
+    count_4: int = Field(default=0)
+    count_5: int = Field(default=0)
+    rating_min: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, Computed(RATING_MIN_SQL, persisted=True)),
+    )
+    rating_max: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, Computed(RATING_MAX_SQL, persisted=True)),
+    )
+
+    def __repr__(self) -> str:
+        return f"<BookRatingStats {self.book_uid}: {self.review_count} reviews>"
+
+
+class BookFacet(SQLModel, table=True):
+    """Rollup of book counts per facet value, kept current by src/books/facets.py"""
+
+    __tablename__ = "book_facets"
+    __table_args__ = (Index("idx_book_facet_count", "facet", "count"),)
+    facet: str = Field(primary_key=True)  # > language | author | publisher | tag
+    value: str = Field(primary_key=True)
+    count: int = Field(default=0)
+
+    def __repr__(self) -> str:
+        return f"<BookFacet {self.facet}={self.value}: {self.count}>"
+
+
 # >           ┌─────────────────────┐
 # >           │        User         │
 # >           │  uid (PK)           │
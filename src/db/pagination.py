@@ -0,0 +1,71 @@
+# pagination.py
+# > keyset (cursor) pagination over (created_at, uid), newest first.
+# > instead of OFFSET n (scan and throw away n rows) we seek straight past the
+# > last row the client has seen, so page 1000 costs the same as page 1.
+from sqlalchemy import tuple_, desc
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+import base64
+import json
+
+from src.errors import InvalidCursor
+
+
+def encode_cursor(created_at: datetime, uid: UUID) -> str:
+    """Opaque cursor for the row the next page should start after"""
+    raw = json.dumps([created_at.isoformat(), str(uid)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, uid = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), UUID(uid)
+    except Exception:
+        raise InvalidCursor()
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for result sets ordered by a computed score (e.g. search rank).
+
+    Ranked results have to be scored in full before they can be sorted, so a seek
+    buys nothing there; the cursor just carries the offset.
+    """
+    raw = json.dumps({"offset": offset})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode()))["offset"])
+    except Exception:
+        raise InvalidCursor()
+    if offset < 0:
+        raise InvalidCursor()
+    return offset
+
+
+def keyset_paginate(statement, created_at_column, uid_column, cursor, limit: int):
+    """Apply seek condition, ordering and limit (+1 row to detect a next page)"""
+    if cursor:
+        created_at, uid = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(created_at_column, uid_column) < tuple_(created_at, uid)
+        )
+    return statement.order_by(desc(created_at_column), desc(uid_column)).limit(
+        limit + 1
+    )
+
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page"""
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.uid)
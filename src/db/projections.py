@@ -0,0 +1,67 @@
+# projections.py
+# > read-only row DTOs for list endpoints.
+# > selecting only the columns a response needs skips the ORM identity map,
+# > instance state and relationship loaders; rows land in small __slots__
+# > objects that the response models read with from_attributes.
+from sqlmodel import select
+from typing import Any, ClassVar, Iterable, List, Tuple
+from src.db.models import Book, Review, Tag
+
+
+class Projection:
+    __slots__ = ()
+    columns: ClassVar[Tuple[Any, ...]] = ()
+
+    @classmethod
+    def select(cls):
+        return select(*cls.columns)
+
+    @classmethod
+    def from_row(cls, row: Iterable[Any]):
+        obj = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, row):
+            setattr(obj, name, value)
+        return obj
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Iterable[Any]]) -> List[Any]:
+        return [cls.from_row(row) for row in rows]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"<{type(self).__name__} {fields}>"
+
+
+class BookRow(Projection):
+    __slots__ = (
+        "uid",
+        "user_uid",
+        "title",
+        "author",
+        "publisher",
+        "published_date",
+        "page_count",
+        "language",
+        "created_at",
+        "updated_at",
+        "version",
+    )
+    columns = tuple(getattr(Book, name) for name in __slots__)
+
+
+class ReviewRow(Projection):
+    __slots__ = (
+        "uid",
+        "rating",
+        "review_text",
+        "user_uid",
+        "book_uid",
+        "created_at",
+        "updated_at",
+    )
+    columns = tuple(getattr(Review, name) for name in __slots__)
+
+
+class TagRow(Projection):
+    __slots__ = ("uid", "name", "created_at")
+    columns = tuple(getattr(Tag, name) for name in __slots__)
@@ -1,81 +1,300 @@
 # redis.py
 import redis.asyncio as redis
 from src.config import settings
-from typing import Optional
+from typing import Iterable, Optional
 from datetime import datetime, timezone
+import asyncio
+import hashlib
 import json
+import time
 
 JTI_EXPIRY = 3600  # 1 hour in seconds
+BLOCKLIST_PREFIX = "blocklist:"
+BLOCKLIST_CHANNEL = "blocklist:revoked"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter: no false negatives, tunable false positives."""
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self._bits = bytearray((size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        # > Kirsch-Mitzenmacher double hashing: k positions from two hashes
+        return ((h1 + i * h2) % self.size_bits for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item)
+        )
+
+
+class BlockListMirror:
+    """Per-worker mirror of revoked JTIs.
+
+    A miss in the Bloom filter proves the token was never revoked, so only possible
+    positives (and every lookup while the mirror is out of sync) go to Redis.
+    """
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self._bloom = BloomFilter(size_bits, hashes)
+        self.synced = False
+        self.last_sync: Optional[float] = None
+        self.local_negatives = 0
+        self.redis_lookups = 0
+
+    def add(self, jti: str) -> None:
+        self._bloom.add(jti)
+
+    def replace(self, bloom: BloomFilter) -> None:
+        self._bloom = bloom
+        self.synced = True
+        self.last_sync = time.time()
+
+    def might_contain(self, jti: str) -> bool:
+        if self.synced and jti not in self._bloom:
+            self.local_negatives += 1
+            return False
+        self.redis_lookups += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "synced": self.synced,
+            "entries": self._bloom.count,
+            "local_negatives": self.local_negatives,
+            "redis_lookups": self.redis_lookups,
+            "last_sync": (
+                datetime.fromtimestamp(self.last_sync, tz=timezone.utc).isoformat()
+                if self.last_sync
+                else None
+            ),
+        }
+
 
 class RedisClient:
     def __init__(self):
         self.client: Optional[redis.Redis] = None
+        self.blocklist_mirror = BlockListMirror(
+            size_bits=settings.BLOCKLIST_BLOOM_BITS,
+            hashes=settings.BLOCKLIST_BLOOM_HASHES,
+        )
+        self._blocklist_task: Optional[asyncio.Task] = None
+        self.healthy = False
+        self._last_connect_attempt = 0.0
+        self._connect_lock = asyncio.Lock()
 
     async def connect(self):
-        """Establish Redis connection"""
-        self.client = redis.Redis(
+        """Create the shared connection pool (once per worker, from lifespan)"""
+        # > never leak the previous pool when reconnecting
+        if self.client is not None:
+            try:
+                await self.client.aclose()
+            except Exception:
+                pass
+            self.client = None
+
+        self._last_connect_attempt = time.monotonic()
+        pool = redis.ConnectionPool(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
-            db=0,
-            password=(
-                settings.REDIS_PASSWORD if hasattr(settings, "REDIS_PASSWORD") else None
-            ),
-            decode_responses=False,  # Keep as bytes for performance
-            max_connections=10,  # Connection pool size
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD or None,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
         )
+        # > Keep as bytes for performance (decode_responses=False)
+        # > from_pool: the client owns the pool, so aclose() also closes its sockets
+        self.client = redis.Redis.from_pool(pool)
         # Test connection
         await self.client.ping()
+        self.healthy = True
+
+    async def ensure_connected(self) -> None:
+        """Lazily (re)connect only when there is no pool or the last command failed.
+
+        Reconnect attempts are rate limited so a Redis outage costs one attempt per
+        REDIS_RECONNECT_BACKOFF seconds, not one per request.
+        """
+        if self.client is not None and self.healthy:
+            return
+        async with self._connect_lock:
+            if self.client is not None and self.healthy:
+                return
+            if (
+                self.client is not None
+                and time.monotonic() - self._last_connect_attempt
+                < settings.REDIS_RECONNECT_BACKOFF
+            ):
+                return
+            try:
+                await self.connect()
+            except Exception as e:
+                self.healthy = False
+                print(f"Redis reconnect failed: {type(e).__name__}: {str(e)}")
+
+    def mark_unhealthy(self) -> None:
+        self.healthy = False
 
     async def disconnect(self):
         """Close Redis connection"""
+        await self.stop_blocklist_sync()
         if self.client:
             await self.client.aclose()
+            self.client = None
 
     async def ping(self) -> bool:
         """Check if Redis connection is alive"""
         try:
-            if not self.client:
-                await self.connect()
+            await self.ensure_connected()
             return await self.client.ping()
         except Exception:
+            self.mark_unhealthy()
             return False
 
+    def pool_stats(self) -> dict:
+        """Connection pool usage for monitoring"""
+        if self.client is None:
+            return {"connected": False}
+        pool = self.client.connection_pool
+        available = len(getattr(pool, "_available_connections", []))
+        in_use = len(getattr(pool, "_in_use_connections", []))
+        return {
+            "connected": True,
+            "healthy": self.healthy,
+            "max_connections": pool.max_connections,
+            "created": available + in_use,
+            "in_use": in_use,
+            "available": available,
+        }
+
     async def add_jti_to_BlockList(
         self, jti: str, user_id: str = None, ttl: int = None
     ) -> None:
-        """Store token metadata for auditing"""
-        if not self.client:
-            await self.connect()
+        """Store token metadata for auditing and broadcast the revocation"""
+        await self.ensure_connected()
 
         token_data = {
             "blocked_at": datetime.now(timezone.utc).isoformat(),
             "user_id": user_id,
             "reason": "logout",
         }
-        await self.client.setex(
-            name=jti,
-            time=ttl or JTI_EXPIRY,
-            value=json.dumps(token_data),
-        )
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.setex(
+                    name=f"{BLOCKLIST_PREFIX}{jti}",
+                    time=ttl or JTI_EXPIRY,
+                    value=json.dumps(token_data),
+                )
+                pipe.publish(BLOCKLIST_CHANNEL, jti)
+                await pipe.execute()
+        except redis.ConnectionError:
+            self.mark_unhealthy()
+            raise
+        self.blocklist_mirror.add(jti)
 
     async def token_in_BlockList(self, jti: str) -> bool:
-        if not self.client:
-            await self.connect()
-        return await self.client.exists(jti) == 1
+        if not self.blocklist_mirror.might_contain(jti):
+            return False
+        await self.ensure_connected()
+        try:
+            return await self.client.exists(f"{BLOCKLIST_PREFIX}{jti}") == 1
+        except redis.ConnectionError:
+            self.mark_unhealthy()
+            raise
 
     async def get_token_info(self, jti: str) -> dict:
         """Get token metadata if needed"""
-        if not self.client:
-            await self.connect()
-        ttl = await self.client.ttl(jti)
+        await self.ensure_connected()
+        ttl = await self.client.ttl(f"{BLOCKLIST_PREFIX}{jti}")
         return {"jti": jti, "ttl": ttl}
 
+    ## --- blocklist mirror sync ---
+    def start_blocklist_sync(self) -> None:
+        """Start the background task that keeps the local blocklist mirror in sync"""
+        if self._blocklist_task is None or self._blocklist_task.done():
+            self._blocklist_task = asyncio.create_task(self._blocklist_sync_loop())
+
+    async def stop_blocklist_sync(self) -> None:
+        if self._blocklist_task is not None:
+            self._blocklist_task.cancel()
+            try:
+                await self._blocklist_task
+            except asyncio.CancelledError:
+                pass
+            self._blocklist_task = None
+        self.blocklist_mirror.synced = False
+
+    async def _resync_blocklist(self) -> None:
+        """Rebuild the mirror from Redis (also drops JTIs whose keys have expired)"""
+        bloom = BloomFilter(
+            self.blocklist_mirror.size_bits, self.blocklist_mirror.hashes
+        )
+        async for key in self.client.scan_iter(
+            match=f"{BLOCKLIST_PREFIX}*", count=1000
+        ):
+            key = key.decode() if isinstance(key, bytes) else key
+            bloom.add(key[len(BLOCKLIST_PREFIX) :])
+        self.blocklist_mirror.replace(bloom)
+
+    async def _blocklist_sync_loop(self) -> None:
+        backoff = 1
+        while True:
+            pubsub = None
+            try:
+                await self.ensure_connected()
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                # > subscribe before the scan so no revocation falls in between
+                await pubsub.subscribe(BLOCKLIST_CHANNEL)
+                await self._resync_blocklist()
+                backoff = 1
+
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        jti = message["data"]
+                        self.blocklist_mirror.add(
+                            jti.decode() if isinstance(jti, bytes) else jti
+                        )
+                    if (
+                        time.time() - self.blocklist_mirror.last_sync
+                        >= settings.BLOCKLIST_RESYNC_INTERVAL
+                    ):
+                        await self._resync_blocklist()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # > fall back to Redis for every lookup until we have resynced
+                self.blocklist_mirror.synced = False
+                print(f"Blocklist sync failed: {type(e).__name__}: {str(e)}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
 
 # Singleton instance
 redis_client = RedisClient()
 
 
 async def get_redis() -> RedisClient:
-    """Dependency for FastAPI"""
-    await redis_client.connect()
+    """Dependency for FastAPI: hands out the shared client, reconnecting only if unhealthy"""
+    await redis_client.ensure_connected()
     return redis_client
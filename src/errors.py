@@ -114,6 +114,24 @@ class InvalidTagName(BooklyException):
     pass
 
 
+class InvalidCursor(BooklyException):
+    """Pagination cursor is malformed or was not issued by this API"""
+
+    pass
+
+
+class BookVersionConflict(BooklyException):
+    """Book was changed by someone else since the client read it"""
+
+    pass
+
+
+class PreconditionFailed(BooklyException):
+    """If-Match does not match the current version of the resource"""
+
+    pass
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
@@ -341,4 +359,40 @@ def register_all_errors(app: FastAPI):
                 "resolution": "Tag names can only contain letters, numbers, spaces, hyphens, and underscores",
             },
         ),
-    )
\ No newline at end of file
+    )
+
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "invalid_cursor",
+                "resolution": "Use the next_cursor value returned by the previous page",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        PreconditionFailed,
+        create_exception_handler(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            initial_detail={
+                "message": "The resource has changed since you last fetched it",
+                "error_code": "precondition_failed",
+                "resolution": "Fetch it again and retry with the new ETag in If-Match",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        BookVersionConflict,
+        create_exception_handler(
+            status_code=status.HTTP_409_CONFLICT,
+            initial_detail={
+                "message": "The book was modified by another request",
+                "error_code": "version_conflict",
+                "resolution": "Fetch the book again and retry with its current version",
+            },
+        ),
+    )
@@ -9,6 +9,10 @@ from src.errors import register_all_errors
 from src.middleware import register_middleware
 from src.db.main import check_db_health
 from src.db.redis import RedisClient, get_redis
+from src.auth.cache import principal_cache, principal_sync, token_claims_cache
+from src.auth.hashing import password_hasher
+from src.books.cache import book_cache
+from src.books.suggest import book_suggester
 from datetime import datetime, timezone
 from src.config import settings
 import importlib.metadata
@@ -76,6 +80,7 @@ Most endpoints require authentication using Bearer tokens.
 **Books** (`/api/v1/books`)
 - `GET /` - Get all books
 - `GET /{book_uid}` - Get specific book with reviews and tags
+- `GET /suggest?q=` - Title and author type-ahead
 - `GET /user/{user_uid}` - Get user's books
 - `POST /` - Create new book
 - `PATCH /{book_uid}` - Update book
@@ -115,6 +120,7 @@ All errors follow this format:
 async def lifespan(app: FastAPI):
     """Application lifespan with proper startup/shutdown"""
     from src.db.redis import redis_client
+    from src.auth.hashing import password_hasher
 
     # Startup
     print(
@@ -130,6 +136,19 @@ async def lifespan(app: FastAPI):
         await redis_client.connect()
         print("✓ Redis connected")
 
+        # Mirror the token blocklist locally (pub/sub + periodic resync)
+        redis_client.start_blocklist_sync()
+
+        # Cache principals only while other workers' invalidations reach us
+        principal_sync.start()
+
+        # Build the per-worker title/author suggest index (pub/sub + periodic rebuild)
+        book_suggester.start()
+
+        # Start argon2 process pool
+        password_hasher.start()
+        print("✓ Password hashing pool started")
+
         yield
 
     except Exception as e:
@@ -139,8 +158,12 @@ async def lifespan(app: FastAPI):
     finally:
         # Shutdown
         print("Shutting down...")
+        await book_suggester.stop()
+        await principal_sync.stop()
         await redis_client.disconnect()
         print("✓ Redis disconnected")
+        password_hasher.shutdown()
+        print("✓ Password hashing pool stopped")
 
 
 try:
@@ -212,7 +235,16 @@ async def health_check(redis_client: RedisClient = Depends(get_redis)):
         "services": {
             "database": db_health,
             "redis": "connected" if redis_health else "disconnected",
+            "redis_pool": redis_client.pool_stats(),
             "api": "running",
         },
+        "caches": {
+            "token_claims": token_claims_cache.stats(),
+            "principals": principal_cache.stats(),
+            "blocklist_mirror": redis_client.blocklist_mirror.stats(),
+            "book_detail": book_cache.stats(),
+            "book_suggest": book_suggester.stats(),
+        },
+        "password_hashing": password_hasher.stats(),
         "version": version,
     }
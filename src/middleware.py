@@ -5,6 +5,11 @@ from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 import time
 import logging
+from src.config import settings
+from src.db.redis import redis_client
+from src.rate_limit import RateLimiter
+
+rate_limiter = RateLimiter(redis_client)
 
 
 # logger = logging.getLogger("uvicorn.access")
@@ -12,6 +17,38 @@ import logging
 
 
 def register_middleware(app: FastAPI):
+    @app.middleware("http")
+    async def rate_limit(request: Request, call_next):
+        # > shed abusive clients before they reach the database
+        if not request.url.path.startswith(settings.API_PREFIX):
+            return await call_next(request)
+
+        result = await rate_limiter.check(request)
+        if result is None:
+            return await call_next(request)
+
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+        }
+        if not result.allowed:
+            headers["Retry-After"] = str(result.retry_after)
+            return JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={
+                    "detail": {
+                        "message": "Too many requests",
+                        "error_code": "rate_limit_exceeded",
+                        "resolution": f"Please retry after {result.retry_after} seconds",
+                    }
+                },
+                headers=headers,
+            )
+
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
+
     @app.middleware("http")
     async def custom_logging(request: Request, call_next):
         start_time = time.time()
@@ -34,6 +71,7 @@ def register_middleware(app: FastAPI):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "Last-Modified"],
     )
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=["localhost", "127.0.0.1"])
 
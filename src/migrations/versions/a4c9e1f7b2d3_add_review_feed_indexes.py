@@ -0,0 +1,40 @@
+"""add review feed indexes
+
+Revision ID: a4c9e1f7b2d3
+Revises: f5b2d8a1c6e4
+Create Date: 2026-10-17 13:40:12.305817
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c9e1f7b2d3"
+down_revision: Union[str, Sequence[str], None] = "f5b2d8a1c6e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serve WHERE book_uid = ? / user_uid = ? ORDER BY created_at DESC, uid DESC
+    op.create_index(
+        "idx_review_book_created",
+        "reviews",
+        ["book_uid", sa.text("created_at DESC"), sa.text("uid DESC")],
+    )
+    op.create_index(
+        "idx_review_user_created",
+        "reviews",
+        ["user_uid", sa.text("created_at DESC"), sa.text("uid DESC")],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_review_user_created", table_name="reviews")
+    op.drop_index("idx_review_book_created", table_name="reviews")
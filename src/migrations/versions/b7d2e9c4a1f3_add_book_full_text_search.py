@@ -0,0 +1,57 @@
+"""add book full text search
+
+Revision ID: b7d2e9c4a1f3
+Revises: 818ba0c223f7
+Create Date: 2026-10-17 09:12:40.218311
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d2e9c4a1f3"
+down_revision: Union[str, Sequence[str], None] = "818ba0c223f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Weighted search document: title (A) > author (B) > publisher (C)
+    op.execute(
+        """
+        ALTER TABLE books ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(publisher, '')), 'C')
+        ) STORED
+        """
+    )
+    op.create_index(
+        "idx_book_search", "books", ["search_vector"], postgresql_using="gin"
+    )
+
+    # Trigram indexes make '%term%' ILIKE and fuzzy (similarity) matching index-backed
+    for column in ("title", "author", "publisher"):
+        op.create_index(
+            f"idx_book_{column}_trgm",
+            "books",
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ("title", "author", "publisher"):
+        op.drop_index(f"idx_book_{column}_trgm", table_name="books")
+    op.drop_index("idx_book_search", table_name="books")
+    op.drop_column("books", "search_vector")
@@ -0,0 +1,69 @@
+"""add book rating stats
+
+Revision ID: b8e3f6a2c1d9
+Revises: a4c9e1f7b2d3
+Create Date: 2026-10-17 14:15:37.902461
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e3f6a2c1d9"
+down_revision: Union[str, Sequence[str], None] = "a4c9e1f7b2d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RATINGS = range(1, 6)
+
+
+def _first_rating_present(ratings) -> str:
+    return " ".join(
+        ["CASE"] + [f"WHEN count_{r} > 0 THEN {r}" for r in ratings] + ["END"]
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_rating_stats",
+        sa.Column("book_uid", sa.Uuid(), nullable=False),
+        sa.Column("review_count", sa.Integer(), nullable=False),
+        sa.Column("rating_sum", sa.Integer(), nullable=False),
+        *(sa.Column(f"count_{r}", sa.Integer(), nullable=False) for r in RATINGS),
+        sa.Column(
+            "rating_min",
+            sa.Integer(),
+            sa.Computed(_first_rating_present(RATINGS), persisted=True),
+        ),
+        sa.Column(
+            "rating_max",
+            sa.Integer(),
+            sa.Computed(_first_rating_present(reversed(RATINGS)), persisted=True),
+        ),
+        sa.ForeignKeyConstraint(["book_uid"], ["books.uid"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("book_uid"),
+    )
+
+    # Backfill; afterwards review writes keep it up to date
+    # (repair later with `python -m src.reviews.stats`)
+    histogram = ", ".join(f"count_{r}" for r in RATINGS)
+    filters = ", ".join(f"count(*) FILTER (WHERE rating = {r})" for r in RATINGS)
+    op.execute(
+        f"""
+        INSERT INTO book_rating_stats (book_uid, review_count, rating_sum, {histogram})
+        SELECT book_uid, count(*), sum(rating), {filters}
+        FROM reviews
+        WHERE book_uid IS NOT NULL
+        GROUP BY book_uid
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("book_rating_stats")
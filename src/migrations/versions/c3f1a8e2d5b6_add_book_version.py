@@ -0,0 +1,33 @@
+"""add book version
+
+Revision ID: c3f1a8e2d5b6
+Revises: b7d2e9c4a1f3
+Create Date: 2026-10-17 11:02:17.640218
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f1a8e2d5b6"
+down_revision: Union[str, Sequence[str], None] = "b7d2e9c4a1f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Optimistic concurrency counter, bumped by every update
+    op.add_column(
+        "books",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("books", "version")
@@ -0,0 +1,73 @@
+"""unique review per user and book
+
+Revision ID: c6d1a9b4e7f2
+Revises: b8e3f6a2c1d9
+Create Date: 2026-10-17 14:52:08.117394
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c6d1a9b4e7f2"
+down_revision: Union[str, Sequence[str], None] = "b8e3f6a2c1d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RATINGS = range(1, 6)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Racing requests could insert the same review twice; keep the latest edit
+    duplicates = op.get_bind().execute(
+        sa.text(
+            """
+            DELETE FROM reviews older
+            USING reviews newer
+            WHERE older.user_uid = newer.user_uid
+              AND older.book_uid = newer.book_uid
+              AND (older.updated_at, older.uid) < (newer.updated_at, newer.uid)
+            RETURNING older.book_uid
+            """
+        )
+    )
+    affected = {book_uid for (book_uid,) in duplicates}
+
+    # Re-count the rating rollup of the books that lost reviews
+    if affected:
+        histogram = ", ".join(f"count_{r}" for r in RATINGS)
+        filters = ", ".join(f"count(*) FILTER (WHERE rating = {r})" for r in RATINGS)
+        op.get_bind().execute(
+            sa.text("DELETE FROM book_rating_stats WHERE book_uid = ANY(:books)"),
+            {"books": list(affected)},
+        )
+        op.get_bind().execute(
+            sa.text(
+                f"""
+                INSERT INTO book_rating_stats
+                    (book_uid, review_count, rating_sum, {histogram})
+                SELECT book_uid, count(*), sum(rating), {filters}
+                FROM reviews
+                WHERE book_uid = ANY(:books)
+                GROUP BY book_uid
+                """
+            ),
+            {"books": list(affected)},
+        )
+
+    # The unique constraint's index also serves every lookup the old one did
+    op.create_unique_constraint(
+        "uq_review_user_book", "reviews", ["user_uid", "book_uid"]
+    )
+    op.drop_index("idx_review_user_book", table_name="reviews")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("idx_review_user_book", "reviews", ["user_uid", "book_uid"])
+    op.drop_constraint("uq_review_user_book", "reviews", type_="unique")
@@ -0,0 +1,48 @@
+"""cascade book deletes
+
+Revision ID: d8e4b1c7f2a9
+Revises: c3f1a8e2d5b6
+Create Date: 2026-10-17 11:48:52.093417
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d8e4b1c7f2a9"
+down_revision: Union[str, Sequence[str], None] = "c3f1a8e2d5b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, constraint) pointing at books.uid
+BOOK_CHILD_KEYS = (
+    ("reviews", "book_uid", "reviews_book_uid_fkey"),
+    ("book_tags", "book_id", "book_tags_book_id_fkey"),
+)
+
+
+def _recreate_foreign_keys(ondelete: Union[str, None]) -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, column, constraint in BOOK_CHILD_KEYS:
+        # book_tags was created by init_db(), not by a migration, on some databases
+        if not inspector.has_table(table):
+            continue
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+        op.create_foreign_key(
+            constraint, table, "books", [column], ["uid"], ondelete=ondelete
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Let Postgres remove a book's reviews and tag links instead of the ORM
+    _recreate_foreign_keys("CASCADE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_foreign_keys(None)
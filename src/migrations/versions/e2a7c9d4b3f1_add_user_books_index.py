@@ -0,0 +1,37 @@
+"""add user books index
+
+Revision ID: e2a7c9d4b3f1
+Revises: d8e4b1c7f2a9
+Create Date: 2026-10-17 12:21:06.874129
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a7c9d4b3f1"
+down_revision: Union[str, Sequence[str], None] = "d8e4b1c7f2a9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serves WHERE user_uid = ? ORDER BY created_at DESC, uid DESC (keyset pages)
+    op.create_index(
+        "idx_book_user_created",
+        "books",
+        ["user_uid", sa.text("created_at DESC"), sa.text("uid DESC")],
+    )
+    # The composite index covers every lookup the single-column one served
+    op.execute("DROP INDEX IF EXISTS idx_book_user")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("idx_book_user", "books", ["user_uid"])
+    op.drop_index("idx_book_user_created", table_name="books")
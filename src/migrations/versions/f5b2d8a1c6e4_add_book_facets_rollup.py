@@ -0,0 +1,59 @@
+"""add book facets rollup
+
+Revision ID: f5b2d8a1c6e4
+Revises: e2a7c9d4b3f1
+Create Date: 2026-10-17 13:02:41.518306
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f5b2d8a1c6e4"
+down_revision: Union[str, Sequence[str], None] = "e2a7c9d4b3f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_facets",
+        sa.Column("facet", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("value", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("facet", "value"),
+    )
+    op.create_index("idx_book_facet_count", "book_facets", ["facet", "count"])
+
+    # Backfill from the current catalog; afterwards writes keep it up to date
+    op.execute(
+        """
+        INSERT INTO book_facets (facet, value, count)
+        SELECT 'language', language, count(*) FROM books GROUP BY language
+        UNION ALL
+        SELECT 'author', author, count(*) FROM books GROUP BY author
+        UNION ALL
+        SELECT 'publisher', publisher, count(*) FROM books GROUP BY publisher
+        """
+    )
+    # book_tags was created by init_db(), not by a migration, on some databases
+    if sa.inspect(op.get_bind()).has_table("book_tags"):
+        op.execute(
+            """
+            INSERT INTO book_facets (facet, value, count)
+            SELECT 'tag', tags.name, count(*)
+            FROM book_tags JOIN tags ON tags.uid = book_tags.tag_id
+            GROUP BY tags.name
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_book_facet_count", table_name="book_facets")
+    op.drop_table("book_facets")
@@ -0,0 +1,141 @@
+from fastapi.requests import Request
+from pydantic import BaseModel
+from typing import Dict, Literal, Optional, Tuple
+import math
+
+from src.auth.cache import token_claims_cache
+from src.config import settings
+from src.db.redis import RedisClient
+
+# > token bucket, evaluated atomically inside Redis.
+# > uses Redis TIME so every worker shares one clock.
+TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local period_ms = tonumber(ARGV[2])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rate = capacity / period_ms
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after_ms = math.ceil((1 - tokens) / rate)
+end
+
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', key, period_ms)
+return {allowed, math.floor(tokens), retry_after_ms}
+"""
+
+
+class RateLimitRule(BaseModel):
+    requests: int
+    period: int  # seconds
+    # > "user" falls back to the client IP for anonymous requests
+    scope: Literal["user", "ip"] = "user"
+
+
+class RateLimitResult(BaseModel):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int  # seconds
+
+
+DEFAULT_RULE = RateLimitRule(
+    requests=settings.RATE_LIMIT_REQUESTS, period=settings.RATE_LIMIT_PERIOD
+)
+
+# > per-route overrides: (method, path) -> rule. These routes get their own bucket
+# > instead of drawing from the global one.
+ROUTE_LIMITS: Dict[Tuple[str, str], RateLimitRule] = {
+    ("POST", f"{settings.API_PREFIX}/auth/login"): RateLimitRule(
+        requests=5, period=60, scope="ip"
+    ),
+    ("POST", f"{settings.API_PREFIX}/auth/signup"): RateLimitRule(
+        requests=10, period=3600, scope="ip"
+    ),
+    ("POST", f"{settings.API_PREFIX}/auth/reset-password-request"): RateLimitRule(
+        requests=5, period=3600, scope="ip"
+    ),
+}
+
+
+def client_identity(request: Request, scope: str) -> str:
+    """Rate limit key for the caller: user uid from a valid bearer token, else IP"""
+    if scope == "user":
+        authorization = request.headers.get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                claims = token_claims_cache.decode(token)
+                return f"user:{claims['user']['uid']}"
+            except Exception:
+                pass
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}"
+
+
+class RateLimiter:
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self._script = None
+        self._script_client = None
+
+    def _get_script(self):
+        # > register once per Redis client (re-registered after a reconnect)
+        if self._script is None or self._script_client is not self.redis_client.client:
+            self._script_client = self.redis_client.client
+            self._script = self._script_client.register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    def rule_for(self, request: Request) -> Tuple[str, RateLimitRule]:
+        route_key = (request.method, request.url.path.rstrip("/") or "/")
+        rule = ROUTE_LIMITS.get(route_key)
+        if rule is not None:
+            return f"{route_key[0]}:{route_key[1]}", rule
+        return "global", DEFAULT_RULE
+
+    async def hit(
+        self, bucket: str, identity: str, rule: RateLimitRule
+    ) -> RateLimitResult:
+        allowed, remaining, retry_after_ms = await self._get_script()(
+            keys=[f"ratelimit:{bucket}:{identity}"],
+            args=[rule.requests, rule.period * 1000],
+        )
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=rule.requests,
+            remaining=int(remaining),
+            retry_after=math.ceil(int(retry_after_ms) / 1000),
+        )
+
+    async def check(self, request: Request) -> Optional[RateLimitResult]:
+        """Consume one token for this request; None if Redis is unavailable (fail open)"""
+        await self.redis_client.ensure_connected()
+        if not self.redis_client.healthy:
+            return None
+
+        bucket, rule = self.rule_for(request)
+        identity = client_identity(request, rule.scope)
+        try:
+            return await self.hit(bucket, identity, rule)
+        except Exception as e:
+            self.redis_client.mark_unhealthy()
+            print(f"Rate limiter unavailable: {type(e).__name__}: {str(e)}")
+            return None
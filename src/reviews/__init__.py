@@ -1,5 +1,8 @@
 from .schemas import (
     ReviewModel,
+    ReviewPageModel,
+    ReviewStatsBatchModel,
+    RatingSummaryModel,
     ReviewCreateModel,
     ReviewUpdateModel,
     ReviewResponse,
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import Annotated, Optional
+from typing import Annotated, Dict, List, Optional, Union
 from uuid import UUID
 from src.db.main import get_session
 from src.reviews.service import ReviewService
-from src.db.models import User
+from src.auth.schemas import UserPrincipal
 from src.reviews.schemas import (
     ReviewCreateModel,
     ReviewUpdateModel,
@@ -13,8 +13,22 @@ from src.reviews.schemas import (
     ReviewDetailModel,
     ReviewResponse,
     ReviewModel,
+    ReviewPageModel,
+    ReviewStatsBatchModel,
+    RatingSummaryModel,
+)
+from src.auth.dependencies import access_token_bearer, get_current_user, RoleChecker
+from src.conditional import (
+    REVIEWS,
+    collection_validators,
+    http_date,
+    if_match_versions,
+    is_not_modified,
+    not_modified,
+    timestamp_version,
+    validator_headers,
+    versioned_tag,
 )
-from src.auth.dependencies import get_current_user, RoleChecker
 
 
 review_service = ReviewService()
@@ -22,28 +36,60 @@ Reviews_router = APIRouter()
 role_checker = RoleChecker(allowed_roles=["admin", "user"])
 
 
+async def _review_validators(review_uid: UUID, session: AsyncSession):
+    """ETag and Last-Modified of a review detail, without loading the review"""
+    state = await review_service.get_review_state(review_uid, session)
+    # > versioned by the review's own updated_at: writes test If-Match against it,
+    # > so an edit to the embedded user or book never fails a review write
+    etag = versioned_tag(timestamp_version(state[0]), review_uid, *state)
+    return etag, http_date(max(t for t in state if t))
+
+
 # > get all reviews
-@Reviews_router.get("/", response_model=list[ReviewModel])
+@Reviews_router.get("/", response_model=Union[ReviewPageModel, List[ReviewModel]])
 async def get_all_reviews(
+    request: Request,
+    response: Response,
     session: Annotated[AsyncSession, Depends(get_session)],
     _: Annotated[bool, Depends(role_checker)],
     book_uid: Optional[UUID] = None,
     user_uid: Optional[UUID] = None,
     min_rating: Optional[int] = Query(None, ge=1, le=5),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Annotated[Optional[str], "next_cursor from the previous page"] = None,
+    skip: Annotated[Optional[int], "Legacy offset paging, returns a plain list"] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
 ):
-    books = await review_service.get_all_reviews(session)
-    return books
+    validators = await collection_validators(request, REVIEWS)
+    if validators is not None:
+        if is_not_modified(request, *validators):
+            return not_modified(*validators)
+        response.headers.update(validator_headers(*validators))
+
+    if skip is not None:
+        return await review_service.get_all_reviews(
+            session, book_uid, user_uid, min_rating, skip, limit
+        )
+
+    reviews, next_cursor = await review_service.get_reviews_page(
+        session, book_uid, user_uid, min_rating, limit, cursor
+    )
+    return {"items": reviews, "next_cursor": next_cursor}
 
 
 # > get a single review
 @Reviews_router.get("/{review_uid}", response_model=ReviewDetailModel)
 async def get_review(
+    request: Request,
+    response: Response,
     review_uid: UUID,
     session: Annotated[AsyncSession, Depends(get_session)],
     _: Annotated[bool, Depends(role_checker)],
 ) -> ReviewDetailModel:
+    etag, last_modified = await _review_validators(review_uid, session)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+
     review = await review_service.get_review(review_uid, session)
     if not review:
         raise HTTPException(
@@ -64,6 +110,16 @@ async def get_book_review_stats(
     return stats
 
 
+# > review statistics for many books at once
+@Reviews_router.post("/stats/batch", response_model=Dict[UUID, RatingSummaryModel])
+async def get_review_stats_batch(
+    batch: ReviewStatsBatchModel,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    _: Annotated[bool, Depends(role_checker)],
+) -> Dict[UUID, RatingSummaryModel]:
+    return await review_service.get_review_stats_batch(batch.book_uids, session)
+
+
 # > add a review to a book
 @Reviews_router.post(
     "/book/{book_uid}",
@@ -73,12 +129,13 @@ async def get_book_review_stats(
 async def add_review_to_book(
     book_uid: UUID,
     review_data: ReviewCreateModel,
-    current_user: Annotated[User, Depends(get_current_user)],
+    user_token: Annotated[dict, Depends(access_token_bearer)],
     session: Annotated[AsyncSession, Depends(get_session)],
     _: Annotated[bool, Depends(role_checker)],
 ) -> ReviewDetailModel:
+    # > keyed by the uid in the token claims: no user lookup before the insert
     new_review = await review_service.add_review_to_book(
-        user_email=current_user.email,
+        user_uid=UUID(user_token.get("user")["uid"]),
         book_uid=book_uid,
         review_data=review_data,
         session=session,
@@ -97,12 +154,14 @@ async def add_review_to_book(
     response_model=ReviewResponseUpdateModel,
 )
 async def update_review(
+    request: Request,
     review_uid: UUID,
     review_data: ReviewUpdateModel,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)],
     _: Annotated[bool, Depends(role_checker)],
 ):
+    if_match = if_match_versions(request)
     current_review = await review_service.get_review(review_uid, session)
     old_review = current_review.model_copy()
 
@@ -116,6 +175,7 @@ async def update_review(
         user_email=current_user.email,
         review_data=review_data,
         session=session,
+        if_match=if_match,
     )
     if updated_review:
         return {
@@ -136,16 +196,17 @@ async def update_review(
     response_model=ReviewDeleteResponseModel,
 )
 async def delete_review(
+    request: Request,
     review_uid: UUID,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)],
     _: Annotated[bool, Depends(role_checker)],
 ):
-
     deleted_review = await review_service.delete_review_from_book(
         review_uid=review_uid,
         user_email=current_user.email,
         session=session,
+        if_match=if_match_versions(request),
     )
     if deleted_review:
         return {
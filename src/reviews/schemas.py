@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_validator
 from sqlmodel import Field
-from typing import Optional, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 from uuid import UUID, uuid4
 from datetime import datetime
 from pydantic import ConfigDict
@@ -25,6 +25,23 @@ class ReviewModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)  # Enable ORM mode
 
 
+class ReviewPageModel(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str] = None  # > pass back as ?cursor= for the next page
+
+
+class ReviewStatsBatchModel(BaseModel):
+    book_uids: List[UUID] = Field(min_length=1, max_length=500)
+
+
+class RatingSummaryModel(BaseModel):
+    count: int
+    average: float
+    min: int
+    max: int
+    histogram: List[int]  # > number of 1..5 star reviews
+
+
 class ReviewCreateModel(BaseModel):
     rating: int = Field(..., ge=1, le=5)
     review_text: str = Field(default=None, max_length=2000)
@@ -1,62 +1,142 @@
-from src.db.models import Review
+from src.db.models import Review, User, Book
+from src.db.projections import BookRow, ReviewRow
 from src.auth.service import UserService
 from src.books.service import BookService
+from src.books.cache import book_cache
+from src.db.pagination import keyset_paginate, split_page
+from src.reviews.stats import (
+    apply_rating_delta,
+    rating_delta_from_select,
+    get_rating_stats,
+    get_rating_stats_batch,
+    rating_summary,
+    stats_response,
+)
 from src.reviews.schemas import ReviewCreateModel, ReviewUpdateModel, ReviewDetailModel
-from typing import Annotated, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select, desc, func
-from uuid import UUID
+from sqlmodel import select, desc
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from uuid import UUID, uuid4
 from fastapi import HTTPException, status
-import logging
-from typing import List
-from decimal import Decimal
+from src.conditional import REVIEWS, collection_versions, timestamp_version
+from src.errors import BookNotFound, PreconditionFailed, ReviewAlreadyExists
+from datetime import datetime, timezone
 
 book_service = BookService()
 user_service = UserService()
 
+# > UserModel fields returned with a newly created review
+REVIEW_USER_FIELDS = (
+    "uid",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "is_verified",
+    "role",
+    "created_at",
+    "updated_at",
+)
+
 
 class ReviewService:
+    def _create_review_statement(
+        self, user_uid: UUID, book_uid: UUID, review_data: ReviewCreateModel
+    ):
+        """Insert-if-absent, stats delta and detail read, as one statement.
+
+        The review is skipped when the user already reviewed the book; otherwise it
+        is counted in book_rating_stats and returned joined to its user and book.
+
+        WITH ins AS (INSERT INTO reviews ... ON CONFLICT DO NOTHING RETURNING ...),
+             stats AS (INSERT INTO book_rating_stats SELECT ... FROM ins
+                       ON CONFLICT (book_uid) DO UPDATE ...)
+        SELECT ins.*, books.*, users.* FROM ins JOIN books JOIN users
+        """
+        reviews, books, users = Review.__table__, Book.__table__, User.__table__
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        ins = (
+            insert(reviews)
+            .values(
+                uid=uuid4(),
+                rating=review_data.rating,
+                review_text=review_data.review_text,
+                user_uid=user_uid,
+                book_uid=book_uid,
+                created_at=now,
+                updated_at=now,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[reviews.c.user_uid, reviews.c.book_uid]
+            )
+            .returning(*(reviews.c[name] for name in ReviewRow.__slots__))
+            .cte("ins")
+        )
+        stats = rating_delta_from_select(ins.c.book_uid, ins.c.rating, ins).cte(
+            "stats"
+        )
+        return (
+            select(
+                *(ins.c[name] for name in ReviewRow.__slots__),
+                *(books.c[n].label(f"book__{n}") for n in BookRow.__slots__),
+                *(users.c[n].label(f"user__{n}") for n in REVIEW_USER_FIELDS),
+            )
+            .select_from(
+                ins.join(books, books.c.uid == ins.c.book_uid).join(
+                    users, users.c.uid == ins.c.user_uid
+                )
+            )
+            .add_cte(stats)
+        )
+
     async def add_review_to_book(
         self,
-        user_email: str,
+        user_uid: UUID,
         book_uid: UUID,
         review_data: ReviewCreateModel,
         session: AsyncSession,
-    ) -> ReviewDetailModel:
+    ) -> dict:
+        """Create a review in a single race-free round trip (ReviewDetailModel shape)"""
+        statement = self._create_review_statement(user_uid, book_uid, review_data)
         try:
-            book = await book_service.get_book(book_uid, session)  ## BOOK object
-            user = await user_service.get_user_by_email(
-                user_email, session
-            )  ## USER object
-            # Check if the user has already reviewed this book
-            statement = select(Review).where(
-                Review.user_uid == user.uid, Review.book_uid == book_uid
-            )
             result = await session.exec(statement)
-            existing_review = result.first()
-
-            if existing_review:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="You have already reviewed this book. Update your existing review instead.",
-                )
+            row = result.first()
+        except IntegrityError:
+            # > reviews.book_uid references books: the book does not exist
+            await session.rollback()
+            raise BookNotFound()
+        if row is None:
+            # > (user_uid, book_uid) is unique, so a racing duplicate lands here too
+            await session.rollback()
+            raise ReviewAlreadyExists()
+        await session.commit()
+        await book_cache.invalidate(book_uid)
+        await collection_versions.bump(REVIEWS)
 
-            new_review = Review.model_validate(review_data.model_dump())
-            new_review.book = book  # > Associate review with book
-            new_review.user = user  # > Associate review with user
-            session.add(new_review)
-            await session.commit()
-            await session.refresh(new_review)
-            return new_review
-        except Exception as e:
-            logging.error(f"Error adding review to book: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to add review to book",
-            ) from e
+        review_width, book_width = len(ReviewRow.__slots__), len(BookRow.__slots__)
+        review = dict(zip(ReviewRow.__slots__, row[:review_width]))
+        review["book"] = BookRow.from_row(row[review_width : review_width + book_width])
+        review["user"] = dict(zip(REVIEW_USER_FIELDS, row[review_width + book_width :]))
+        return review
 
-    async def get_review(self, review_uid: UUID, session: AsyncSession) -> Review:
-        statement = select(Review).where(Review.uid == review_uid)
+    async def get_review(
+        self, review_uid: UUID, session: AsyncSession, for_update: bool = False
+    ) -> Review:
+        """`for_update` row-locks the review until commit, for read-modify-write"""
+        statement = (
+            select(Review)
+            .where(Review.uid == review_uid)
+            .options(selectinload(Review.user), selectinload(Review.book))
+        )
+        if for_update:
+            # > concurrent writers queue here and then see the committed rating (or
+            # > no row), so each old rating is subtracted from the rollup exactly once
+            statement = statement.with_for_update(of=Review).execution_options(
+                populate_existing=True
+            )
         result = await session.exec(statement)
         review = result.first()
         if not review:
@@ -66,6 +146,41 @@ class ReviewService:
             )
         return review
 
+    async def get_review_state(
+        self, review_uid: UUID, session: AsyncSession
+    ) -> Tuple[datetime, Optional[datetime], Optional[datetime]]:
+        """updated_at of the review and of the user and book embedded in its detail"""
+        statement = (
+            select(Review.updated_at, User.updated_at, Book.updated_at)
+            .outerjoin(User, User.uid == Review.user_uid)
+            .outerjoin(Book, Book.uid == Review.book_uid)
+            .where(Review.uid == review_uid)
+        )
+        result = await session.exec(statement)
+        state = result.first()
+        if state is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Review not found",
+            )
+        return tuple(state)
+
+    @staticmethod
+    def review_filters(
+        book_uid: Optional[UUID] = None,
+        user_uid: Optional[UUID] = None,
+        min_rating: Optional[int] = None,
+    ) -> list:
+        """WHERE criteria shared by the review feed and its collection validators"""
+        criteria = []
+        if book_uid:
+            criteria.append(Review.book_uid == book_uid)
+        if user_uid:
+            criteria.append(Review.user_uid == user_uid)
+        if min_rating:
+            criteria.append(Review.rating >= min_rating)
+        return criteria
+
     async def get_all_reviews(
         self,
         session: AsyncSession,
@@ -74,36 +189,82 @@ class ReviewService:
         min_rating: Optional[int] = None,
         skip: int = 0,
         limit: int = 100,
-    ) -> List[Review]:
-
-        statement = select(Review)
-
-        if book_uid:
-            statement = statement.where(Review.book_uid == book_uid)
-        if user_uid:
-            statement = statement.where(Review.user_uid == user_uid)
-        if min_rating:
-            statement = statement.where(Review.rating >= min_rating)
+    ) -> List[ReviewRow]:
 
+        statement = ReviewRow.select().where(
+            *self.review_filters(book_uid, user_uid, min_rating)
+        )
         statement = (
             statement.order_by(desc(Review.created_at)).offset(skip).limit(limit)
         )
         result = await session.exec(statement)
-        return result.all()
+        return ReviewRow.from_rows(result.all())
+
+    def _reviews_page_statement(
+        self,
+        book_uid: Optional[UUID],
+        user_uid: Optional[UUID],
+        min_rating: Optional[int],
+        limit: int,
+        cursor: Optional[str],
+    ):
+        # > a book_uid or user_uid filter seeks on idx_review_book_created or
+        # > idx_review_user_created; min_rating is checked on the rows scanned
+        return keyset_paginate(
+            ReviewRow.select().where(
+                *self.review_filters(book_uid, user_uid, min_rating)
+            ),
+            Review.created_at,
+            Review.uid,
+            cursor,
+            limit,
+        )
+
+    async def get_reviews_page(
+        self,
+        session: AsyncSession,
+        book_uid: Optional[UUID] = None,
+        user_uid: Optional[UUID] = None,
+        min_rating: Optional[int] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[ReviewRow], Optional[str]]:
+        """Keyset page of reviews, newest first"""
+        statement = self._reviews_page_statement(
+            book_uid, user_uid, min_rating, limit, cursor
+        )
+        result = await session.exec(statement)
+        return split_page(ReviewRow.from_rows(result.all()), limit)
+
+    @staticmethod
+    def _check_if_match(review: Review, if_match: Optional[List[int]]) -> None:
+        """If-Match against a review read FOR UPDATE: atomic with the write"""
+        if if_match is None:
+            return
+        if timestamp_version(review.updated_at) not in if_match:
+            raise PreconditionFailed()
 
     async def delete_review_from_book(
-        self, review_uid: UUID, user_email: str, session: AsyncSession
+        self,
+        review_uid: UUID,
+        user_email: str,
+        session: AsyncSession,
+        if_match: Optional[List[int]] = None,
     ) -> Review:
         user = await user_service.get_user_by_email(user_email, session)
-        review = await self.get_review(review_uid, session)
+        review = await self.get_review(review_uid, session, for_update=True)
 
         if review.user_uid != user.uid : # and user.role != "admin"
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to delete this review or user id incorrect",
             )
+        self._check_if_match(review, if_match)
         await session.delete(review)
+        await apply_rating_delta(session, review.book_uid, removed=review.rating)
         await session.commit()
+        await book_cache.invalidate(review.book_uid)
+        await collection_versions.bump(REVIEWS)
         return review
 
     async def update_review(
@@ -112,57 +273,43 @@ class ReviewService:
         user_email: str,
         review_data: ReviewUpdateModel,
         session: AsyncSession,
+        if_match: Optional[List[int]] = None,
     ):
         user = await user_service.get_user_by_email(user_email, session)
-        review = await self.get_review(review_uid, session)
-        if not review or (review.user.uid != user.uid):
+        review = await self.get_review(review_uid, session, for_update=True)
+        if not review or (review.user_uid != user.uid):
             raise HTTPException(
                 detail="Cannot update this review",
                 status_code=status.HTTP_403_FORBIDDEN,
             )
+        self._check_if_match(review, if_match)
+        old_rating = review.rating
         for key, value in review_data.model_dump().items():
             setattr(review, key, value)
+        review.update_timestamp()
         session.add(review)
+        await apply_rating_delta(
+            session, review.book_uid, added=review.rating, removed=old_rating
+        )
         await session.commit()
+        await book_cache.invalidate(review.book_uid)
+        await collection_versions.bump(REVIEWS)
         await session.refresh(review)
         return review
 
     async def get_book_review_stats(self, book_uid: UUID, session: AsyncSession) -> dict:
-        """Get review statistics for a book"""
-        
-        statement = select(
-            func.count(Review.uid).label("total_reviews"),
-            func.coalesce(func.avg(Review.rating), 0).label("average_rating"),
-            func.coalesce(func.min(Review.rating), 0).label("min_rating"),
-            func.coalesce(func.max(Review.rating), 0).label("max_rating")
-        ).where(Review.book_uid == book_uid)
-        
-        result = await session.exec(statement)
-        stats = result.one()
-        
-        # Handle None values safely
-        avg_rating = float(stats.average_rating) if stats.average_rating is not None else 0.0
-        
-        return {
-            "book_uid": book_uid,
-            "total_reviews": stats.total_reviews,  
-            "average_rating": round(avg_rating, 2),
-            "min_rating": stats.min_rating or 0,
-            "max_rating": stats.max_rating or 0,
-            "rating_distribution": await self.get_rating_distribution(book_uid, session)
-        }
+        """Get review statistics for a book (one primary-key read of the rollup)"""
+        stats = await get_rating_stats(book_uid, session)
+        return stats_response(book_uid, stats)
 
     async def get_rating_distribution(self, book_uid: UUID, session: AsyncSession) -> dict:
         """Get count of each rating (1-5) for a book"""
-        statement = select(
-            Review.rating,
-            func.count(Review.uid).label("count")
-        ).where(
-            Review.book_uid == book_uid
-        ).group_by(Review.rating).order_by(Review.rating)
-        
-        result = await session.exec(statement)
-        distribution = {row.rating: row.count for row in result.all()}
-        
-        # Ensure all ratings 1-5 are present
-        return {rating: distribution.get(rating, 0) for rating in range(1, 6)}
\ No newline at end of file
+        stats = await get_rating_stats(book_uid, session)
+        return stats_response(book_uid, stats)["rating_distribution"]
+
+    async def get_review_stats_batch(
+        self, book_uids: List[UUID], session: AsyncSession
+    ) -> Dict[UUID, dict]:
+        """Compact stats for many books, keyed by book uid, from one rollup query"""
+        stats = await get_rating_stats_batch(book_uids, session)
+        return {book_uid: rating_summary(row) for book_uid, row in stats.items()}
@@ -0,0 +1,200 @@
+# > per-book rating aggregates (GET /reviews/book/{book_uid}/stats) served from the
+# > book_rating_stats rollup. Review writes apply a delta to their book's row in the
+# > same transaction, so reading stats is one primary-key lookup however many
+# > reviews the book has.
+#
+# > backfill / repair:  python -m src.reviews.stats [--book BOOK_UID]
+from typing import Dict, List, Optional
+from uuid import UUID
+import argparse
+import asyncio
+
+from sqlalchemy import Integer, any_, bindparam, cast, func, literal, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import BookRatingStats, Review
+
+RATINGS = range(1, 6)
+HISTOGRAM_COLUMNS = tuple(f"count_{rating}" for rating in RATINGS)
+COUNTER_COLUMNS = ("review_count", "rating_sum") + HISTOGRAM_COLUMNS
+
+
+def rating_delta(
+    book_uid: UUID, added: Optional[int] = None, removed: Optional[int] = None
+) -> dict:
+    """Counter changes for one review rating being added and/or removed"""
+    delta = {
+        "book_uid": book_uid,
+        "review_count": (added is not None) - (removed is not None),
+        "rating_sum": (added or 0) - (removed or 0),
+    }
+    for rating, column in zip(RATINGS, HISTOGRAM_COLUMNS):
+        delta[column] = (added == rating) - (removed == rating)
+    return delta
+
+
+def rating_delta_statement(delta: dict):
+    """INSERT ... ON CONFLICT (book_uid) DO UPDATE SET col = col + excluded.col"""
+    stats = BookRatingStats.__table__
+    statement = insert(stats).values(**delta)
+    return statement.on_conflict_do_update(
+        index_elements=[stats.c.book_uid],
+        set_={
+            column: stats.c[column] + statement.excluded[column]
+            for column in COUNTER_COLUMNS
+        },
+    )
+
+
+def rating_delta_from_select(book_uid_column, rating_column, source):
+    """Counter upsert for reviews inserted earlier in the same statement.
+
+    `source` is e.g. an INSERT ... RETURNING CTE, so a new review and its stats
+    delta cost one round trip.
+    """
+    stats = BookRatingStats.__table__
+    delta = select(
+        book_uid_column,
+        literal(1),
+        rating_column,
+        *(cast(rating_column == rating, Integer) for rating in RATINGS),
+    ).select_from(source)
+    statement = insert(stats).from_select(["book_uid", *COUNTER_COLUMNS], delta)
+    return statement.on_conflict_do_update(
+        index_elements=[stats.c.book_uid],
+        set_={
+            column: stats.c[column] + statement.excluded[column]
+            for column in COUNTER_COLUMNS
+        },
+    )
+
+
+async def apply_rating_delta(
+    session: AsyncSession,
+    book_uid: Optional[UUID],
+    added: Optional[int] = None,
+    removed: Optional[int] = None,
+) -> None:
+    """Record a review write in the rollup; the caller commits with its own write"""
+    if book_uid is None or added == removed:
+        return
+    await session.exec(rating_delta_statement(rating_delta(book_uid, added, removed)))
+
+
+def stats_response(book_uid: UUID, stats: Optional[BookRatingStats]) -> dict:
+    """The stats payload for one book (all zeros when it has no reviews)"""
+    if stats is None or not stats.review_count:
+        distribution = {rating: 0 for rating in RATINGS}
+        return {
+            "book_uid": book_uid,
+            "total_reviews": 0,
+            "average_rating": 0.0,
+            "min_rating": 0,
+            "max_rating": 0,
+            "rating_distribution": distribution,
+        }
+    return {
+        "book_uid": book_uid,
+        "total_reviews": stats.review_count,
+        "average_rating": round(stats.rating_sum / stats.review_count, 2),
+        "min_rating": stats.rating_min or 0,
+        "max_rating": stats.rating_max or 0,
+        "rating_distribution": {
+            rating: getattr(stats, column)
+            for rating, column in zip(RATINGS, HISTOGRAM_COLUMNS)
+        },
+    }
+
+
+async def get_rating_stats(
+    book_uid: UUID, session: AsyncSession
+) -> Optional[BookRatingStats]:
+    return await session.get(BookRatingStats, book_uid)
+
+
+def rating_summary(stats: Optional[BookRatingStats]) -> dict:
+    """Compact stats for batch responses: histogram is [1-star, ..., 5-star]"""
+    if stats is None or not stats.review_count:
+        return {"count": 0, "average": 0.0, "min": 0, "max": 0, "histogram": [0] * 5}
+    return {
+        "count": stats.review_count,
+        "average": round(stats.rating_sum / stats.review_count, 2),
+        "min": stats.rating_min or 0,
+        "max": stats.rating_max or 0,
+        "histogram": [getattr(stats, column) for column in HISTOGRAM_COLUMNS],
+    }
+
+
+def rating_stats_batch_statement(book_uids: List[UUID]):
+    # > one array parameter whatever the batch size, so the plan is reused
+    uids = bindparam("uids", book_uids, type_=ARRAY(PG_UUID(as_uuid=True)))
+    return select(BookRatingStats).where(BookRatingStats.book_uid == any_(uids))
+
+
+async def get_rating_stats_batch(
+    book_uids: List[UUID], session: AsyncSession
+) -> Dict[UUID, Optional[BookRatingStats]]:
+    """Rollup rows for many books in one query; None where a book has no reviews"""
+    unique_uids = list(dict.fromkeys(book_uids))
+    results = await session.exec(rating_stats_batch_statement(unique_uids))
+    found = {stats.book_uid: stats for stats in results.all()}
+    return {book_uid: found.get(book_uid) for book_uid in unique_uids}
+
+
+async def rebuild_rating_stats(
+    session: AsyncSession, book_uid: Optional[UUID] = None
+) -> int:
+    """Recompute the rollup from reviews (one book, or all); returns rows written.
+
+    The EXCLUSIVE lock keeps readers going but makes review writers wait, so a
+    delta is either already in the recount or applied on top of it, never both.
+    """
+    stats = BookRatingStats.__table__
+    reviews = Review.__table__
+    source = (
+        select(
+            reviews.c.book_uid,
+            func.count(),
+            func.sum(reviews.c.rating),
+            *(func.count().filter(reviews.c.rating == rating) for rating in RATINGS),
+        )
+        .where(reviews.c.book_uid.is_not(None))
+        .group_by(reviews.c.book_uid)
+    )
+    stale = stats.delete().where(
+        ~select(reviews.c.uid).where(reviews.c.book_uid == stats.c.book_uid).exists()
+    )
+    if book_uid is not None:
+        source = source.where(reviews.c.book_uid == book_uid)
+        stale = stale.where(stats.c.book_uid == book_uid)
+
+    upsert = insert(stats).from_select(["book_uid", *COUNTER_COLUMNS], source)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[stats.c.book_uid],
+        set_={column: upsert.excluded[column] for column in COUNTER_COLUMNS},
+    )
+
+    await session.exec(text("LOCK TABLE book_rating_stats IN EXCLUSIVE MODE"))
+    await session.exec(stale)
+    results = await session.exec(upsert)
+    await session.commit()
+    return results.rowcount
+
+
+async def _main(book_uid: Optional[UUID]) -> None:
+    from src.db.main import SessionLocal, engine
+
+    try:
+        async with SessionLocal() as session:
+            rows = await rebuild_rating_stats(session, book_uid)
+        print(f"Rebuilt rating stats for {rows} book(s)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild book_rating_stats")
+    parser.add_argument("--book", type=UUID, help="only this book (default: all)")
+    asyncio.run(_main(parser.parse_args().book))
@@ -1,12 +1,19 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 from src.auth.dependencies import RoleChecker
 from src.books.schemas import Book
 from src.db.main import get_session
+from src.conditional import (
+    TAGS,
+    collection_validators,
+    is_not_modified,
+    not_modified,
+    validator_headers,
+)
 
 from .schemas import TagAddModel, TagCreateModel, TagModel
 from .service import TagService
@@ -18,7 +25,15 @@ user_role_checker = Depends(RoleChecker(["user", "admin"]))
 
 
 @tags_router.get("/", response_model=List[TagModel], dependencies=[user_role_checker])
-async def get_all_tags(session: AsyncSession = Depends(get_session)) -> List[TagModel]:
+async def get_all_tags(
+    request: Request, response: Response, session: AsyncSession = Depends(get_session)
+) -> List[TagModel]:
+    validators = await collection_validators(request, TAGS)
+    if validators is not None:
+        if is_not_modified(request, *validators):
+            return not_modified(*validators)
+        response.headers.update(validator_headers(*validators))
+
     tags = await tag_service.get_tags(session)
     return tags
 
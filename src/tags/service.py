@@ -1,10 +1,15 @@
+from collections import Counter
 from fastapi import status
 from fastapi.exceptions import HTTPException
-from sqlmodel import desc, select
+from sqlmodel import desc, func, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
 from src.books.service import BookService
-from src.db.models import Tag
+from src.books.cache import book_cache
+from src.conditional import TAGS, collection_versions
+from src.books.facets import TAG_FACET, apply_facet_deltas, tag_facet_deltas
+from src.db.models import BookTag, Tag
+from src.db.projections import TagRow
 
 from src.tags.schemas import TagAddModel, TagCreateModel
 from src.errors import TagNotFound,TagAlreadyExists,  BookNotFound
@@ -19,23 +24,32 @@ server_error = HTTPException(
 class TagService:
     async def get_tags(self, session: AsyncSession):
         """Get all tags"""
-        statement = select(Tag).order_by(desc(Tag.created_at))
+        statement = TagRow.select().order_by(desc(Tag.created_at))
         result = await session.exec(statement)
-        return result.all()
+        return TagRow.from_rows(result.all())
 
     async def add_tags_to_book(
         self, book_uid: UUID, tag_data: TagAddModel, session: AsyncSession
     ):
         """Add tags to a book"""
         book = await book_service.get_book(book_uid=book_uid, session=session)
+        linked = {tag.name for tag in book.tags}
+        added = []
         for tag_item in tag_data.tags:
+            if tag_item.name in linked:
+                continue  # > already on the book; a second link row would collide
             result = await session.exec(select(Tag).where(Tag.name == tag_item.name))
             tag = result.one_or_none()
             if not tag:
                 tag = Tag(name=tag_item.name)
             book.tags.append(tag)
+            linked.add(tag.name)
+            added.append(tag.name)
         session.add(book)
+        await apply_facet_deltas(session, tag_facet_deltas(added))
         await session.commit()
+        await book_cache.invalidate(book_uid)
+        await collection_versions.bump(TAGS)
         await session.refresh(book)
         return book
 
@@ -45,6 +59,11 @@ class TagService:
         result = await session.exec(statement)
         return result.first()
 
+    async def _count_tagged_books(self, tag_uid: UUID, session: AsyncSession) -> int:
+        statement = select(func.count()).where(BookTag.tag_id == tag_uid)
+        result = await session.exec(statement)
+        return result.one()
+
     async def add_tag(self, tag_data: TagCreateModel, session: AsyncSession):
         """Create a tag"""
         statement = select(Tag).where(Tag.name == tag_data.name)
@@ -55,6 +74,7 @@ class TagService:
         new_tag = Tag(name=tag_data.name)
         session.add(new_tag)
         await session.commit()
+        await collection_versions.bump(TAGS)
         await session.refresh(new_tag)
         return new_tag
 
@@ -65,10 +85,21 @@ class TagService:
         tag = await self.get_tag_by_uid(tag_uid, session)
         if not tag:
             raise TagNotFound()
+        old_name = tag.name
         update_data_dict = tag_update_data.model_dump()
         for k, v in update_data_dict.items():
             setattr(tag, k, v)
+        tag.update_timestamp()
+        if tag.name != old_name:
+            # > every book carrying the tag moves to the new facet value
+            tagged = await self._count_tagged_books(tag_uid, session)
+            deltas = Counter({(TAG_FACET, old_name): -tagged})
+            deltas[(TAG_FACET, tag.name)] += tagged
+            await apply_facet_deltas(session, deltas)
         await session.commit()
+        # > the tag name is embedded in every tagged book's cached detail
+        await book_cache.invalidate_all()
+        await collection_versions.bump(TAGS)
         await session.refresh(tag)
         return tag
 
@@ -77,8 +108,12 @@ class TagService:
         tag = await self.get_tag_by_uid(tag_uid, session)
         if not tag:
             raise TagNotFound()
+        tagged = await self._count_tagged_books(tag_uid, session)
         await session.delete(tag)
+        await apply_facet_deltas(session, Counter({(TAG_FACET, tag.name): -tagged}))
         await session.commit()
+        await book_cache.invalidate_all()
+        await collection_versions.bump(TAGS)
         return tag
 
 
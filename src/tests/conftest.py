@@ -1,3 +1,8 @@
+import os
+
+# > fail on any relationship the code under test did not load explicitly
+os.environ.setdefault("STRICT_RELATIONSHIP_LOADING", "true")
+
 from src.db.main import get_session
 from src.main import app
 from unittest.mock import Mock
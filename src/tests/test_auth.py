@@ -1,4 +1,27 @@
 from src.auth.schemas import UserCreateModel
+from src.auth.cache import TokenClaimsCache, PrincipalCache, PrincipalCacheSync
+from src.auth.schemas import UserPrincipal
+from uuid import uuid4
+from src.auth.utils import create_access_token
+from src.auth.hashing import PasswordHashingService
+from src.db.redis import BlockListMirror, BloomFilter
+from datetime import timedelta
+import asyncio
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+from src.auth import dependencies
+from src.auth.dependencies import (
+    AccessTokenBearer,
+    RoleChecker,
+    access_token_bearer,
+    get_current_user,
+)
+from src.db.main import get_session
+from src.db.redis import RedisClient, get_redis
+from fakeredis import FakeAsyncRedis, FakeServer
+import time
+import pytest
+
 auth_prefix = f"/api/v1/auth"
 
 
@@ -18,3 +41,197 @@ def test_user_creation(fake_db_session, fake_user_service, test_client):
     assert fake_user_service.user_exists_called_once_with(signup_data["email"], fake_db_session)
     assert fake_user_service.create_user_called_once()
     assert fake_user_service.create_user_called_once_with(user_data, fake_db_session)
+
+
+def test_token_claims_cache_decodes_once():
+    """Verified claims are served from the cache after the first decode."""
+    cache = TokenClaimsCache(max_size=2)
+    token = create_access_token(
+        user_data={"uid": "1", "email": "a@b.com", "role": "user"}
+    )
+
+    first = cache.decode(token)
+    second = cache.decode(token)
+
+    assert first == second
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_token_claims_cache_rejects_invalid_and_expired_tokens():
+    """Invalid or already expired tokens raise and are never cached."""
+    cache = TokenClaimsCache(max_size=2)
+    expired = create_access_token(user_data={"uid": "1"}, expiry=timedelta(seconds=-5))
+
+    with pytest.raises(Exception):
+        cache.decode("not-a-token")
+    with pytest.raises(Exception):
+        cache.decode(expired)
+    assert cache.stats()["size"] == 0
+
+
+def test_principal_cache_invalidation():
+    """Cached principals are dropped as soon as the user is invalidated."""
+    cache = PrincipalCache(max_size=10, ttl=60)
+    cache.synced = True
+    principal = UserPrincipal(
+        uid=uuid4(), email="a@b.com", role="user", is_verified=False
+    )
+    cache.set(principal, cache.generation)
+    assert cache.get("a@b.com") == principal
+
+    cache.invalidate("a@b.com")
+    assert cache.get("a@b.com") is None
+
+
+def test_principal_cache_drops_fills_read_before_an_invalidation():
+    """A lookup that read the user before an invalidation cannot cache the old row."""
+    cache = PrincipalCache(max_size=2, ttl=60)
+    cache.synced = True
+    principal = UserPrincipal(
+        uid=uuid4(), email="a@b.com", role="user", is_verified=False
+    )
+
+    generation = cache.generation  # > the lookup starts reading...
+    cache.invalidate("a@b.com")  # > ...another request commits and invalidates
+    cache.set(principal, generation)
+    assert cache.get("a@b.com") is None
+
+    # > other emails are not fenced, reads started afterwards fill normally
+    other = principal.model_copy(update={"email": "c@d.com"})
+    cache.set(other, generation)
+    cache.set(principal, cache.generation)
+    assert (cache.get("c@d.com"), cache.get("a@b.com")) == (other, principal)
+
+    # > trimming old invalidations keeps fencing the reads that predate them
+    cache.invalidate("e@f.com")
+    cache.invalidate("g@h.com")
+    cache.invalidate("a@b.com")
+    stale = cache.generation - 1
+    cache.invalidate("i@j.com")
+    cache.invalidate("k@l.com")
+    cache.set(principal, stale)
+    assert cache.get("a@b.com") is None
+
+    generation = cache.generation
+    cache.clear()
+    cache.set(other, generation)
+    assert cache.get("c@d.com") is None
+
+
+def test_principal_invalidation_reaches_every_worker():
+    """An invalidation in one worker evicts the principal in the others; a cache
+    that is not subscribed is bypassed."""
+    server = FakeServer()
+
+    def worker():
+        redis_client = RedisClient()
+        redis_client.client = FakeAsyncRedis(server=server)
+        redis_client.healthy = True
+        redis_client._last_connect_attempt = time.monotonic()
+        return PrincipalCacheSync(PrincipalCache(max_size=10, ttl=60), redis_client)
+
+    principal = UserPrincipal(
+        uid=uuid4(), email="a@b.com", role="user", is_verified=False
+    )
+    first, second = worker(), worker()
+
+    async def run():
+        second.cache.set(principal, second.cache.generation)
+        assert second.cache.get("a@b.com") is None  # > not subscribed yet
+
+        for sync in (first, second):
+            sync.start()
+        while not (first.cache.synced and second.cache.synced):
+            await asyncio.sleep(0.01)
+        second.cache.set(principal, second.cache.generation)
+        assert second.cache.get("a@b.com") == principal
+
+        await first.invalidate("a@b.com")
+        for _ in range(100):
+            if second.cache.get("a@b.com") is None:
+                break
+            await asyncio.sleep(0.01)
+        cached = second.cache.get("a@b.com")
+        for sync in (first, second):
+            await sync.stop()
+        return cached
+
+    assert asyncio.run(run()) is None
+    assert not second.cache.synced
+
+
+def test_password_hashing_service_round_trip():
+    """Hashes produced in the process pool verify, and metrics settle back to idle."""
+    hasher = PasswordHashingService(max_workers=1, max_concurrency=1)
+
+    async def run():
+        hashed = await hasher.hash("StrongPass1")
+        return (
+            await hasher.verify("StrongPass1", hashed),
+            await hasher.verify("WrongPass1", hashed),
+        )
+
+    try:
+        assert asyncio.run(run()) == (True, False)
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["in_flight"] == 0
+    assert hasher.stats()["completed"] == 3
+
+
+def test_blocklist_mirror_answers_negatives_locally():
+    """Once synced, unknown JTIs never reach Redis while revoked ones always do."""
+    mirror = BlockListMirror(size_bits=1 << 16, hashes=5)
+    assert mirror.might_contain("anything")  # not synced yet -> ask Redis
+
+    bloom = BloomFilter(size_bits=1 << 16, hashes=5)
+    bloom.add("revoked-jti")
+    mirror.replace(bloom)
+
+    assert mirror.might_contain("revoked-jti")
+    assert not mirror.might_contain("fresh-jti")
+    assert mirror.stats()["local_negatives"] == 1
+
+
+def test_auth_context_resolves_once_per_request(monkeypatch):
+    """Several bearers and checkers on one route share a single auth resolution."""
+    calls = {"blocklist": 0, "principal": 0}
+    principal = UserPrincipal(
+        uid=uuid4(), email="a@b.com", role="user", is_verified=True
+    )
+
+    class FakeRedis:
+        async def token_in_BlockList(self, jti):
+            calls["blocklist"] += 1
+            return False
+
+    async def fake_get_principal(email, session):
+        calls["principal"] += 1
+        return principal
+
+    monkeypatch.setattr(dependencies.user_service, "get_principal", fake_get_principal)
+
+    app = FastAPI()
+    app.dependency_overrides[get_redis] = lambda: FakeRedis()
+    app.dependency_overrides[get_session] = lambda: None
+    role_checker = RoleChecker(allowed_roles=["user"])
+
+    @app.get("/protected")
+    async def protected(
+        a: dict = Depends(AccessTokenBearer()),
+        b: dict = Depends(access_token_bearer),
+        _: bool = Depends(role_checker),
+        user: UserPrincipal = Depends(get_current_user),
+    ):
+        return {"email": user.email}
+
+    token = create_access_token(
+        user_data={"uid": str(principal.uid), "email": "a@b.com", "role": "user"}
+    )
+    response = TestClient(app).get(
+        "/protected", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    assert calls == {"blocklist": 1, "principal": 1}
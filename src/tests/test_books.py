@@ -1,3 +1,60 @@
+from src.db.pagination import (
+    encode_cursor,
+    decode_cursor,
+    decode_offset_cursor,
+    encode_offset_cursor,
+    split_page,
+)
+from src.db.projections import BookRow
+from src.books.cache import (
+    BOOK_DETAIL_PREFIX,
+    BookResponseCache,
+    CachedResponse,
+    book_version_key,
+)
+from src.books.bulk import (
+    BulkParseError,
+    encode_csv,
+    encode_ndjson,
+    iter_lines,
+    iter_records,
+)
+from src.books.facets import (
+    book_facet_deltas,
+    facet_upsert_statements,
+    tag_facet_deltas,
+)
+from src.books.suggest import SuggestIndex
+from src.conditional import (
+    BOOKS,
+    REVIEWS,
+    TAGS,
+    CollectionVersions,
+    collection_version_key,
+    entity_tag,
+    http_date,
+    if_match_versions,
+    is_not_modified,
+    versioned_tag,
+)
+from src.errors import PreconditionFailed
+from fastapi.requests import Request
+from src.db.models import Book, BookTag, Review, Tag, User
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from src.books.service import BookService
+from src.books.schemas import BookResponse, BookSearchModel
+from src.errors import InvalidCursor
+from datetime import datetime, date
+from src.db.redis import RedisClient
+from fakeredis import FakeAsyncRedis
+from types import SimpleNamespace
+import asyncio
+import time
+from uuid import uuid4
+import pytest
+
 
 books_prefix = "/api/v1/books"
 
@@ -10,4 +67,396 @@ def test_get_all_books(test_client, fake_book_service, fake_db_session):
     fake_book_service.get_all_books.return_value = fake_books
 
     response = test_client.get(url=books_prefix)
-    assert fake_book_service.get_all_books_called_once_with(fake_db_session)
\ No newline at end of file
+    assert fake_book_service.get_all_books_called_once_with(fake_db_session)
+
+
+def test_cursor_round_trip():
+    """Cursors are opaque but decode back to the exact (created_at, uid) key."""
+    created_at, uid = datetime(2025, 12, 1, 10, 30, 0, 123456), uuid4()
+    assert decode_cursor(encode_cursor(created_at, uid)) == (created_at, uid)
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_split_page_uses_look_ahead_row():
+    """A next cursor is only issued when the look-ahead row exists."""
+    rows = [
+        SimpleNamespace(created_at=datetime(2025, 1, day), uid=uuid4())
+        for day in (3, 2, 1)
+    ]
+
+    items, next_cursor = split_page(rows, limit=2)
+    assert items == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1].created_at, rows[1].uid)
+
+    items, next_cursor = split_page(rows, limit=3)
+    assert items == rows and next_cursor is None
+
+
+def test_book_row_projection_selects_only_response_columns():
+    """List queries select plain columns and map them onto slotted rows."""
+    selected = [column.key for column in BookRow.select().selected_columns]
+    assert selected == list(BookRow.__slots__)
+
+    values = (
+        uuid4(), uuid4(), "Dune", "Frank Herbert", "Chilton",
+        date(1965, 8, 1), 412, "en", datetime(2025, 1, 1), datetime(2025, 1, 2), 1,
+    )
+    row = BookRow.from_row(values)
+    assert not hasattr(row, "__dict__")
+    assert BookResponse.model_validate(row, from_attributes=True).title == "Dune"
+
+
+def test_relationships_never_load_implicitly():
+    """Every relationship is opt-in per query; tests run in strict (raise) mode."""
+    for model in (User, Book, Review, Tag):
+        for relationship in inspect(model).relationships:
+            assert relationship.lazy == "raise", f"{model.__name__}.{relationship.key}"
+
+
+def test_book_cache_coalesces_misses_and_survives_redis_outage():
+    """Concurrent misses share one load; without Redis every call still answers."""
+
+    class RedisDown:
+        healthy = False
+
+        async def ensure_connected(self):
+            pass
+
+    cache = BookResponseCache(RedisDown(), ttl=60, jitter=0.1)
+    loads = 0
+
+    async def render():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return CachedResponse(b'{"title": "Dune"}', entity_tag(b'{"title": "Dune"}'))
+
+    async def run():
+        book_uid = uuid4()
+        bodies = await asyncio.gather(
+            *(cache.get_or_load(book_uid, render) for _ in range(5))
+        )
+        return bodies, await cache.get_or_load(book_uid, render)
+
+    bodies, later = asyncio.run(run())
+    assert [cached.body for cached in bodies] == [b'{"title": "Dune"}'] * 5
+    assert later == bodies[0]
+    assert loads == 2
+    assert cache.stats()["coalesced"] == 4
+
+
+def _redis_client(client) -> RedisClient:
+    redis_client = RedisClient()
+    redis_client.client = client
+    redis_client.healthy = True
+    redis_client._last_connect_attempt = time.monotonic()
+    return redis_client
+
+
+def test_book_version_keys_expire_after_the_bodies_cached_under_them():
+    """Invalidating a book refreshes its version key's TTL instead of leaking it."""
+    client = FakeAsyncRedis()
+    cache = BookResponseCache(_redis_client(client), ttl=60, jitter=0.1)
+    book_uid = uuid4()
+
+    async def render():
+        return CachedResponse(b"{}", entity_tag(b"{}"))
+
+    async def run():
+        await cache.get_or_load(book_uid, render)
+        await cache.invalidate(book_uid)
+        await cache.get_or_load(book_uid, render)
+        return (
+            await client.get(book_version_key(book_uid)),
+            await client.ttl(book_version_key(book_uid)),
+            await client.ttl(f"{BOOK_DETAIL_PREFIX}{book_uid}:0:1"),
+        )
+
+    version, version_ttl, body_ttl = asyncio.run(run())
+    assert version == b"1"
+    assert version_ttl == cache.version_ttl == 132
+    assert 60 <= body_ttl <= 66 < version_ttl
+
+
+def _request(**headers):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": books_prefix,
+            "query_string": b"",
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+    )
+
+
+def test_conditional_get_and_if_match():
+    """If-None-Match beats If-Modified-Since; If-Match rejects stale writes."""
+    etag = entity_tag(b"body")
+    last_modified = http_date(datetime(2025, 1, 1, 12, 0, 0))
+
+    assert is_not_modified(_request(if_none_match=f"W/{etag}"), etag, last_modified)
+    assert not is_not_modified(
+        _request(if_none_match='"other"', if_modified_since=last_modified),
+        etag,
+        last_modified,
+    )
+    assert is_not_modified(
+        _request(if_modified_since=last_modified), etag, last_modified
+    )
+    assert not is_not_modified(_request(), etag, last_modified)
+
+    # > If-Match yields the row versions the write itself must still match
+    current = versioned_tag(7, b"body")
+    assert if_match_versions(_request(if_match=current)) == [7]
+    both = f'{versioned_tag(6, b"older body")}, {current}'
+    assert if_match_versions(_request(if_match=both)) == [6, 7]
+    assert if_match_versions(_request()) is None
+    assert if_match_versions(_request(if_match="*")) is None
+    for stale in (f"W/{current}", etag):
+        with pytest.raises(PreconditionFailed):
+            if_match_versions(_request(if_match=stale))
+
+
+def test_collection_versions_move_on_write_and_survive_a_lost_counter():
+    """List validators come from one Redis counter per collection, not an aggregate."""
+    client = FakeAsyncRedis()
+    redis_client = _redis_client(client)
+    versions = CollectionVersions(redis_client)
+
+    async def run():
+        first = await versions.state(BOOKS)
+        assert await versions.state(BOOKS) == first
+        await versions.bump(BOOKS, REVIEWS)
+        bumped = await versions.state(BOOKS)
+        # > a counter lost with Redis must not restart below the versions handed out
+        await client.delete(collection_version_key(BOOKS))
+        restarted = await versions.state(BOOKS)
+        return first, bumped, restarted, await versions.state(TAGS)
+
+    first, bumped, restarted, tags = asyncio.run(run())
+    assert bumped[0] == first[0] + 1 and bumped[1] >= first[1]
+    assert restarted[0] > bumped[0]
+    assert tags is not None and versions.errors == 0
+
+    redis_client.healthy = False
+    assert asyncio.run(versions.state(BOOKS)) is None
+
+
+def test_bulk_parser_streams_lines_across_chunks():
+    """Records are cut at newlines whatever the chunking; bad lines become errors."""
+    upload = (
+        b"title,author,publisher,published_date,page_count,language\r\n"
+        b"Dune,Frank Herbert,Chilton,1965-08-01,412,en\n"
+        b"\n"
+        b"Emma,Jane Austen\n"
+        + b"x" * 3000
+        + b"\nBeloved,Toni Morrison,Knopf,1987-09-02,324,en"
+    )
+
+    async def chunks():
+        for start in range(0, len(upload), 7):
+            yield upload[start : start + 7]
+
+    async def run():
+        lines = iter_lines(chunks(), max_line_bytes=1024)
+        return [item async for item in iter_records(lines, "csv")]
+
+    records = asyncio.run(run())
+    assert [line for line, _ in records] == [2, 4, 5, 6]
+    assert records[0][1]["title"] == "Dune"
+    assert isinstance(records[1][1], BulkParseError)  # > missing fields
+    assert isinstance(records[2][1], BulkParseError)  # > line too long
+    assert records[3][1]["page_count"] == "324"
+
+
+def test_bulk_parser_rejects_long_line_inside_one_chunk():
+    """An oversized line that never straddles a chunk boundary is still rejected."""
+    upload = b"short\n" + b"x" * 3000 + b"\nafter\n"
+
+    async def chunks():
+        yield upload
+
+    async def run():
+        return [item async for item in iter_lines(chunks(), max_line_bytes=1024)]
+
+    lines = asyncio.run(run())
+    assert [line for line, _ in lines] == [1, 2, 3]
+    assert lines[0][1] == "short" and lines[2][1] == "after"
+    assert isinstance(lines[1][1], BulkParseError)
+
+
+def test_export_encoders_write_one_line_per_row():
+    """NDJSON lines parse back; CSV gets its header only on the first batch."""
+    row = BookRow.from_row(
+        (
+            uuid4(), uuid4(), "Dune", "Frank Herbert", "Chilton, Inc.",
+            date(1965, 8, 1), 412, "en", datetime(2025, 1, 1), datetime(2025, 1, 2), 1,
+        )
+    )
+
+    (line,) = encode_ndjson([row]).splitlines()
+    assert BookResponse.model_validate_json(line).uid == row.uid
+
+    first = encode_csv([row], BookRow.__slots__, header=True).decode().splitlines()
+    later = encode_csv([row], BookRow.__slots__).decode().splitlines()
+    assert first[0] == ",".join(BookRow.__slots__) and first[1:] == later
+    assert '"Chilton, Inc.",1965-08-01,412' in later[0]
+
+
+def test_update_book_is_a_single_locked_statement():
+    """Old row, ownership/version check and update share one round trip."""
+    statement = BookService()._update_statement(
+        uuid4(), uuid4(), {"title": "Dune Messiah"}, version=3
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE" in sql and "RETURNING" in sql
+    assert '"old".version = ' in sql and "version=(books.version + " in sql
+    assert len(statement.selected_columns) == 2 * len(BookRow.__slots__)
+
+    # > If-Match is a predicate of the same UPDATE, not a separate read
+    statement = BookService()._update_statement(
+        uuid4(), uuid4(), {"title": "Dune Messiah"}, version=None, if_match=[4, 5]
+    )
+    compiled = statement.compile(dialect=postgresql.dialect())
+    assert '"old".version IN (__[POSTCOMPILE_' in str(compiled)
+    assert [4, 5] in compiled.params.values()
+
+
+def test_book_children_are_deleted_by_the_database():
+    """Reviews and tag links cascade in Postgres; the ORM never loads them to delete."""
+    for column in (Review.__table__.c.book_uid, BookTag.__table__.c.book_id):
+        (foreign_key,) = column.foreign_keys
+        assert foreign_key.ondelete == "CASCADE"
+    assert inspect(Book).relationships["reviews"].passive_deletes
+    assert inspect(Book).relationships["tags"].passive_deletes
+
+
+def test_user_books_index_matches_the_page_order():
+    """WHERE user_uid = ? ORDER BY created_at DESC, uid DESC is one range scan."""
+    (index,) = [i for i in Book.__table__.indexes if i.name == "idx_book_user_created"]
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert "(user_uid, created_at DESC, uid DESC)" in ddl
+
+
+def test_facet_deltas_fold_into_one_sorted_upsert():
+    """An edit moves one count between values; untouched facets are not written."""
+    old = SimpleNamespace(language="en", author="Frank Herbert", publisher="Chilton")
+    new = SimpleNamespace(language="en", author="Frank Herbert", publisher="Ace")
+    deltas = book_facet_deltas(new)
+    deltas.subtract(book_facet_deltas(old))
+    deltas.update(tag_facet_deltas(["scifi"], sign=-1))
+
+    (statement,) = facet_upsert_statements(deltas)
+    compiled = statement.compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT (facet, value) DO UPDATE" in str(compiled)
+    assert "count = (book_facets.count + excluded.count)" in str(compiled)
+    assert list(compiled.params.values()) == [
+        "publisher", "Ace", 1, "publisher", "Chilton", -1, "tag", "scifi", -1,
+    ]
+    assert facet_upsert_statements(book_facet_deltas(old, 0)) == []
+
+
+def test_suggest_index_prefix_lookup_and_incremental_updates():
+    """Whole-value matches come first; edits and deletes are reflected at once."""
+    dune, emma, lotr = uuid4(), uuid4(), uuid4()
+    index = SuggestIndex.build(
+        [
+            (dune, "Dune", "Frank Herbert"),
+            (emma, "Émile et les Enfants", "Émile Zola"),
+            (lotr, "The Lord of the Rings", "J. R. R. Tolkien"),
+        ]
+    )
+
+    assert [(s["kind"], s["text"]) for s in index.suggest("  EMI", 5)] == [
+        ("title", "Émile et les Enfants"),
+        ("author", "Émile Zola"),
+    ]
+    assert index.suggest("lord", 5) == [
+        {"kind": "title", "text": "The Lord of the Rings", "book_uid": str(lotr)}
+    ]
+
+    index.put(dune, "Dune Messiah", "Frank Herbert")
+    index.remove(lotr)
+    assert [s["text"] for s in index.suggest("dune m", 5)] == ["Dune Messiah"]
+    assert index.suggest("lord", 5) == [] and len(index) == 2
+
+
+def test_suggest_index_batch_update_matches_a_full_build():
+    """A batch too big to insort is merged in one pass, with the same result."""
+    books = {str(uuid4()): (f"Title {i}", f"Author {i % 7}") for i in range(200)}
+    index = SuggestIndex.build((uid, *book) for uid, book in books.items())
+
+    changes = {uid: None for uid in list(books)[:50]}
+    changes.update({uid: ("Renamed Book", "New Author") for uid in list(books)[50:80]})
+    changes.update({str(uuid4()): ("Added Book", "New Author") for _ in range(30)})
+    index.update(changes)
+
+    for uid, book in changes.items():
+        if book is None:
+            books.pop(uid)
+        else:
+            books[uid] = book
+    expected = SuggestIndex.build((uid, *book) for uid, book in books.items())
+    assert (index._starts, index._words) == (expected._starts, expected._words)
+    assert len(index) == 180
+
+
+def test_batch_get_binds_all_uids_as_one_array():
+    """Any number of uids is one `uid = ANY(:uids)` parameter, not an IN list."""
+    uids = [uuid4() for _ in range(3)]
+    compiled = BookService()._batch_statement(uids).compile(
+        dialect=postgresql.dialect()
+    )
+    assert "books.uid = ANY (%(uids)s::UUID[])" in str(compiled)
+    assert compiled.params == {"uids": uids}
+
+
+def test_search_filters_target_their_own_columns_and_escape_wildcards():
+    """author/publisher filter their own column; % and _ in a term match literally."""
+    statement = BookService()._search_statement(
+        BookSearchModel(author="100%_sure", publisher="Ace")
+    )
+    compiled = statement.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert "books.author ILIKE %(author_1)s::VARCHAR ESCAPE '\\'" in sql
+    assert "books.publisher ILIKE %(publisher_1)s::VARCHAR ESCAPE '\\'" in sql
+    assert "books.title" not in sql.split("WHERE")[1]
+    assert compiled.params == {"author_1": "%100\\%\\_sure%", "publisher_1": "%Ace%"}
+
+
+def test_ranked_search_orders_by_relevance_and_pages_by_offset():
+    """Full-text or fuzzy match, best first; the cursor carries the next offset."""
+    statements = []
+
+    class FakeSession:
+        async def exec(self, statement):
+            statements.append(statement)
+            row = (uuid4(), uuid4(), "Dune", "Frank Herbert", "Ace", date(1965, 8, 1))
+            row += (412, "en", datetime(2024, 1, 1), datetime(2024, 1, 1), 1)
+            return SimpleNamespace(all=lambda: [row] * 3)
+
+    service = BookService()
+    search = BookSearchModel(query="dune")
+    books, next_cursor = asyncio.run(
+        service.search_books_page(FakeSession(), search, 2, encode_offset_cursor(20))
+    )
+    compiled = statements[0].compile(dialect=postgresql.dialect())
+    sql = " ".join(str(compiled).split())
+
+    assert "books.search_vector @@ websearch_to_tsquery('simple'::regconfig" in sql
+    assert "OR (books.title %% %(title_1)s::VARCHAR)" in sql
+    assert "ORDER BY ts_rank_cd(books.search_vector, websearch_to_tsquery(" in sql
+    assert sql.endswith(
+        "similarity(books.title, %(similarity_1)s::VARCHAR) DESC, "
+        "books.created_at DESC, books.uid DESC "
+        "LIMIT %(param_1)s::INTEGER OFFSET %(param_2)s::INTEGER"
+    )
+    assert (compiled.params["param_1"], compiled.params["param_2"]) == (3, 20)
+    assert len(books) == 2 and decode_offset_cursor(next_cursor) == 22
@@ -0,0 +1,123 @@
+from src.rate_limit import (
+    DEFAULT_RULE,
+    RateLimiter,
+    RateLimitRule,
+    client_identity,
+)
+from src.auth.utils import create_access_token
+from src.config import settings
+from src.db.redis import RedisClient
+from fastapi.requests import Request
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import ConnectionError
+import asyncio
+import time
+from uuid import uuid4
+
+
+def _request(method="GET", path="/", host="203.0.113.7", **headers):
+    return Request(
+        {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+            "client": (host, 50000),
+        }
+    )
+
+
+def _limiter(client) -> RateLimiter:
+    redis_client = RedisClient()
+    redis_client.client = client
+    redis_client.healthy = True
+    redis_client._last_connect_attempt = time.monotonic()
+    return RateLimiter(redis_client)
+
+
+def test_client_identity_prefers_token_user_over_ip():
+    """A valid bearer token keys by user; anonymous or bad tokens key by IP."""
+    user_uid = str(uuid4())
+    token = create_access_token({"uid": user_uid, "email": "a@example.com"})
+
+    assert client_identity(_request(authorization=f"Bearer {token}"), "user") == (
+        f"user:{user_uid}"
+    )
+    assert client_identity(_request(authorization="Bearer nonsense"), "user") == (
+        "ip:203.0.113.7"
+    )
+    assert client_identity(_request(), "user") == "ip:203.0.113.7"
+    # > ip-scoped rules ignore the token so one user cannot dodge them
+    assert client_identity(_request(authorization=f"Bearer {token}"), "ip") == (
+        "ip:203.0.113.7"
+    )
+
+
+def test_auth_routes_get_their_own_ip_buckets():
+    """Login, signup and reset requests override the global rule; others share it."""
+    limiter = _limiter(None)
+    auth = f"{settings.API_PREFIX}/auth"
+
+    for path, requests, period in (
+        (f"{auth}/login", 5, 60),
+        (f"{auth}/signup/", 10, 3600),
+        (f"{auth}/reset-password-request", 5, 3600),
+    ):
+        bucket, rule = limiter.rule_for(_request("POST", path))
+        assert bucket == f"POST:{path.rstrip('/')}"
+        assert (rule.requests, rule.period, rule.scope) == (requests, period, "ip")
+
+    assert limiter.rule_for(_request("GET", f"{auth}/login")) == (
+        "global",
+        DEFAULT_RULE,
+    )
+    assert limiter.rule_for(_request("GET", f"{settings.API_PREFIX}/books")) == (
+        "global",
+        DEFAULT_RULE,
+    )
+
+
+def test_token_bucket_allows_then_rejects_with_retry_after():
+    """The Lua bucket spends one token per hit and reports when the next one is due."""
+    limiter = _limiter(FakeAsyncRedis())
+    rule = RateLimitRule(requests=2, period=60, scope="ip")
+
+    async def run():
+        hits = [await limiter.hit("global", "ip:203.0.113.7", rule) for _ in range(3)]
+        other = await limiter.hit("global", "ip:198.51.100.1", rule)
+        return hits, other
+
+    (first, second, third), other = asyncio.run(run())
+    assert (first.allowed, first.remaining, first.limit) == (True, 1, 2)
+    assert (second.allowed, second.remaining) == (True, 0)
+    assert (third.allowed, third.remaining) == (False, 0)
+    # > 2 tokens per 60s refill one every 30s
+    assert third.retry_after == 30
+    assert first.retry_after == 0
+    assert other.allowed
+
+
+def test_rate_limiter_fails_open_when_redis_errors():
+    """A Redis error lets the request through and marks the client unhealthy."""
+
+    class BrokenRedis:
+        def register_script(self, script):
+            async def run(keys, args):
+                raise ConnectionError("connection refused")
+
+            return run
+
+    limiter = _limiter(BrokenRedis())
+
+    async def run():
+        first = await limiter.check(_request())
+        # > inside the reconnect backoff no Redis call is made at all
+        second = await limiter.check(_request())
+        return first, second
+
+    assert asyncio.run(run()) == (None, None)
+    assert limiter.redis_client.healthy is False
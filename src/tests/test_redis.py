@@ -0,0 +1,96 @@
+from src.config import settings
+from src.db.redis import RedisClient
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeAsyncRedisConnection
+import redis.asyncio
+import asyncio
+
+
+def _fake_pools(monkeypatch, server: FakeServer, pools: list) -> None:
+    """Make RedisClient.connect() build its pools on an in-memory fakeredis server"""
+    connection_pool = redis.asyncio.ConnectionPool
+
+    def fake_pool(**kwargs):
+        # > fakeredis does not answer redis-py's in-band health check PINGs
+        kwargs.pop("health_check_interval", None)
+        pool = connection_pool(
+            connection_class=FakeAsyncRedisConnection, server=server, **kwargs
+        )
+        pools.append(pool)
+        return pool
+
+    monkeypatch.setattr(redis.asyncio, "ConnectionPool", fake_pool)
+
+
+def test_ensure_connected_backs_off_then_recovers(monkeypatch):
+    """One reconnect per backoff window while Redis is down; healthy after a ping."""
+    server, pools = FakeServer(), []
+    _fake_pools(monkeypatch, server, pools)
+    client = RedisClient()
+    assert client.pool_stats() == {"connected": False}
+
+    async def run():
+        server.connected = False
+        await client.ensure_connected()
+        assert (len(pools), client.healthy) == (1, False)
+
+        # > inside the backoff window nothing is attempted, even once Redis is back
+        server.connected = True
+        await asyncio.gather(*(client.ensure_connected() for _ in range(5)))
+        assert (len(pools), client.healthy) == (1, False)
+
+        client._last_connect_attempt -= settings.REDIS_RECONNECT_BACKOFF
+        await client.ensure_connected()
+        assert (len(pools), client.healthy) == (2, True)
+
+        # > a healthy client keeps its pool: no new pool per request
+        assert await client.ping()
+        await client.ensure_connected()
+        stats = client.pool_stats()
+        await client.disconnect()
+        return stats
+
+    stats = asyncio.run(run())
+    assert len(pools) == 2
+    assert client.client is None
+    assert stats == {
+        "connected": True,
+        "healthy": True,
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "created": 1,
+        "in_use": 0,
+        "available": 1,
+    }
+
+
+def test_mark_unhealthy_reconnects_once_the_backoff_has_passed(monkeypatch):
+    """A failed command marks the client unhealthy; the next call after the
+    backoff replaces the pool instead of reusing the broken one."""
+    server, pools = FakeServer(), []
+    _fake_pools(monkeypatch, server, pools)
+    client = RedisClient()
+
+    def connections(pool):
+        return list(pool._available_connections) + list(pool._in_use_connections)
+
+    async def run():
+        await client.ensure_connected()
+        old_connections = connections(pools[0])
+        assert old_connections and all(c.is_connected for c in old_connections)
+        client.mark_unhealthy()
+        await client.ensure_connected()
+        assert (len(pools), client.healthy) == (1, False)
+
+        client._last_connect_attempt -= settings.REDIS_RECONNECT_BACKOFF
+        await client.ensure_connected()
+        assert client.client.connection_pool is pools[-1]
+        # > the replaced pool's sockets are closed, not left to leak
+        assert not any(c.is_connected for c in old_connections)
+
+        new_connections = connections(pools[1])
+        assert new_connections and all(c.is_connected for c in new_connections)
+        await client.disconnect()
+        assert not any(c.is_connected for c in new_connections)
+
+    asyncio.run(run())
+    assert len(pools) == 2 and client.healthy
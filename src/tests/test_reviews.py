@@ -0,0 +1,123 @@
+from src.reviews.service import ReviewService
+from src.reviews.schemas import ReviewCreateModel
+from src.reviews.stats import (
+    rating_delta,
+    rating_delta_statement,
+    rating_stats_batch_statement,
+    rating_summary,
+    stats_response,
+)
+from src.db.models import BookRatingStats
+from src.db.models import Review
+from src.db.pagination import encode_cursor
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy import UniqueConstraint
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+import asyncio
+
+
+def test_review_feed_filters_seek_past_the_cursor():
+    """Filters reach the query and pages seek on (created_at, uid), newest first."""
+    statement = ReviewService()._reviews_page_statement(
+        book_uid=uuid4(),
+        user_uid=None,
+        min_rating=4,
+        limit=20,
+        cursor=encode_cursor(datetime(2025, 1, 1), uuid4()),
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "reviews.book_uid = " in sql and "reviews.rating >= " in sql
+    assert "reviews.user_uid" not in sql.split("WHERE")[1]
+    assert "(reviews.created_at, reviews.uid) < " in sql
+    assert "ORDER BY reviews.created_at DESC, reviews.uid DESC" in sql
+
+
+def test_review_feed_indexes_match_the_page_order():
+    """Per-book and per-user feeds are one range scan each."""
+    indexes = {index.name: index for index in Review.__table__.indexes}
+    for name, column in (
+        ("idx_review_book_created", "book_uid"),
+        ("idx_review_user_created", "user_uid"),
+    ):
+        ddl = str(CreateIndex(indexes[name]).compile(dialect=postgresql.dialect()))
+        assert f"({column}, created_at DESC, uid DESC)" in ddl
+
+
+def test_rating_change_is_one_counter_upsert():
+    """Editing 2 -> 5 stars moves one histogram count and the sum, not the total."""
+    book_uid = uuid4()
+    delta = rating_delta(book_uid, added=5, removed=2)
+    assert delta["review_count"] == 0 and delta["rating_sum"] == 3
+    assert (delta["count_2"], delta["count_5"], delta["count_3"]) == (-1, 1, 0)
+
+    sql = str(rating_delta_statement(delta).compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (book_uid) DO UPDATE" in sql
+    assert "count_5 = (book_rating_stats.count_5 + excluded.count_5)" in sql
+
+
+def test_stats_response_reads_the_rollup_row():
+    book_uid = uuid4()
+    stats = BookRatingStats(
+        book_uid=book_uid, review_count=3, rating_sum=10,
+        count_1=0, count_2=0, count_3=1, count_4=1, count_5=1,
+        rating_min=3, rating_max=5,
+    )
+    response = stats_response(book_uid, stats)
+    assert response["average_rating"] == 3.33
+    assert (response["min_rating"], response["max_rating"]) == (3, 5)
+    assert response["rating_distribution"] == {1: 0, 2: 0, 3: 1, 4: 1, 5: 1}
+    assert stats_response(book_uid, None)["total_reviews"] == 0
+
+
+def test_batch_stats_read_rollup_rows_with_one_array_parameter():
+    """Hundreds of books cost one `book_uid = ANY(:uids)` lookup, no aggregation."""
+    uids = [uuid4() for _ in range(300)]
+    compiled = rating_stats_batch_statement(uids).compile(dialect=postgresql.dialect())
+    assert "book_rating_stats.book_uid = ANY (%(uids)s::UUID[])" in str(compiled)
+    assert "GROUP BY" not in str(compiled) and compiled.params == {"uids": uids}
+
+    assert rating_summary(None) == {
+        "count": 0, "average": 0.0, "min": 0, "max": 0, "histogram": [0] * 5,
+    }
+
+
+def test_review_creation_is_one_conflict_safe_statement():
+    """Insert, stats delta and detail read share one round trip; duplicates no-op."""
+    (unique,) = [
+        constraint
+        for constraint in Review.__table__.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+    assert [column.name for column in unique.columns] == ["user_uid", "book_uid"]
+
+    statement = ReviewService()._create_review_statement(
+        uuid4(), uuid4(), ReviewCreateModel(rating=4, review_text="A quiet classic.")
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (user_uid, book_uid) DO NOTHING RETURNING" in sql
+    assert "INSERT INTO book_rating_stats" in sql and "FROM ins" in sql
+    assert "JOIN books ON books.uid = ins.book_uid" in sql
+
+
+def test_review_writes_lock_the_row_they_read_the_old_rating_from():
+    """Update/delete read the review FOR UPDATE, so racing writers serialize."""
+    statements = []
+
+    class FakeSession:
+        async def exec(self, statement):
+            statements.append(statement)
+            return SimpleNamespace(first=lambda: SimpleNamespace(rating=4))
+
+    service = ReviewService()
+    asyncio.run(service.get_review(uuid4(), FakeSession()))
+    asyncio.run(service.get_review(uuid4(), FakeSession(), for_update=True))
+
+    plain, locked = (
+        str(statement.compile(dialect=postgresql.dialect()))
+        for statement in statements
+    )
+    assert "FOR UPDATE" not in plain
+    assert locked.endswith("FOR UPDATE OF reviews")